@@ -10,7 +10,7 @@ this_directory = Path(__file__).parent
 long_description = (this_directory / "README.md").read_text(encoding='utf-8')
 
 # Read requirements
-requirements = (this_directory / "requirements.txt").read_text().strip().split('\n')
+requirements = (this_directory / "requirements.txt").read_text().strip().splitlines()
 
 setup(
     name="speech-transcription-system",
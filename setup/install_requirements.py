@@ -7,30 +7,99 @@ This script installs required packages and provides clear feedback.
 import subprocess
 import sys
 import os
+import shutil
+import tempfile
+import argparse
+import importlib
+import importlib.util
+import json
+import re
+from importlib import metadata
+from functools import lru_cache
+from pathlib import Path
+
+from setup_utils import PIP_INSTALL_OPTIONS, ask, get_stamp_path
+
+# Known pip failure causes, matched in a single pass over the pip output;
+# the group number identifies the cause (see install_requirements)
+PIP_ERROR_PATTERNS = re.compile(
+    r'(libpython.*cannot open shared object file)'
+    r'|(no module named)'
+    r'|(permission denied)'
+    r'|(timeout|connection)',
+    re.IGNORECASE,
+)
+LIBPYTHON_ERROR, MISSING_MODULE_ERROR, PERMISSION_ERROR, NETWORK_ERROR = 1, 2, 3, 4
+
+@lru_cache(maxsize=None)
+def read_requirements_bytes(requirements_file='requirements.txt'):
+    """Read the requirements file once; later callers reuse the cached contents."""
+    with open(requirements_file, 'rb') as f:
+        return f.read()
+
+def get_install_stamp_path(requirements_file='requirements.txt'):
+    """Return the stamp file for this requirements file, Python and environment."""
+    return get_stamp_path('installed', read_requirements_bytes(requirements_file))
+
+def pip_supports_report():
+    """Return True if the installed pip can write a JSON --report (pip >= 22.2)."""
+    try:
+        major, minor = (int(part) for part in metadata.version('pip').split('.')[:2])
+    except (metadata.PackageNotFoundError, ValueError):
+        return False
+    return (major, minor) >= (22, 2)
+
+def load_pip_report(report_path):
+    """Return the package names pip resolved for installation, or None without a report.
+    
+    pip only writes the report once dependency resolution has succeeded, so a
+    missing report means the failure happened while resolving.
+    """
+    try:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return [item['metadata']['name'] for item in report.get('install', [])]
+
+# Result of check_hpc_environment(), computed once per process
+_HPC_ENVIRONMENT = None
 
 def check_hpc_environment():
     """Check HPC-specific environment setup."""
+    global _HPC_ENVIRONMENT
+    if _HPC_ENVIRONMENT is not None:
+        return _HPC_ENVIRONMENT
+    
     print("\n🖥️  Checking HPC environment...")
     
-    # Check if we're on an HPC system
+    # Check if we're on an HPC system. Stats are slow on busy parallel
+    # filesystems, so probe /cluster once before the individual paths; any()
+    # stops at the first indicator found
     hpc_indicators = [
         "/cluster/projects/nn10008k",
         "/cluster/work/users",
         "/cluster/software"
     ]
     
-    on_hpc = any(os.path.exists(path) for path in hpc_indicators)
+    on_hpc = os.path.isdir('/cluster') and any(os.path.exists(path) for path in hpc_indicators)
     
     if on_hpc:
         print("   ✅ HPC environment detected")
         
         # Check if Python module is loaded
-        python_path = subprocess.run(['which', 'python3'], capture_output=True, text=True)
-        if python_path.returncode == 0:
-            print(f"   Python location: {python_path.stdout.strip()}")
+        python_path = shutil.which('python3') or ''
+        if python_path:
+            print(f"   Python location: {python_path}")
             
-            # Check if it's a module-loaded Python
-            if '/cluster/software' in python_path.stdout or 'GCCcore' in python_path.stdout:
+            # Check if it's a module-loaded Python. Lmod and Environment
+            # Modules list loaded modules in LOADEDMODULES; fall back to the
+            # interpreter path where neither is in use
+            loaded_modules = os.environ.get('LOADEDMODULES', '').split(':')
+            python_modules = [m for m in loaded_modules if m.startswith('Python/')]
+            if python_modules:
+                print(f"   ✅ Python module loaded: {python_modules[-1]}")
+            elif '/cluster/software' in python_path or 'GCCcore' in python_path:
                 print("   ✅ Python module appears to be loaded")
             else:
                 print("   ⚠️  Python may not be from a loaded module")
@@ -43,11 +112,11 @@ def check_hpc_environment():
         else:
             print("   ⚠️  Library paths may not be configured")
             print("   💡 This might cause 'libpython' errors during installation")
-        
-        return True
     else:
         print("   ℹ️  Not on HPC system")
-        return False
+    
+    _HPC_ENVIRONMENT = on_hpc
+    return on_hpc
 
 def install_requirements():
     """Install requirements with better error handling."""
@@ -65,9 +134,15 @@ def install_requirements():
     
     print("📋 Found requirements.txt")
     
+    # Skip pip entirely if this exact requirements set was already installed
+    stamp_file = get_install_stamp_path()
+    if stamp_file.exists() and stamp_file.stat().st_mtime > os.path.getmtime('requirements.txt'):
+        print("✅ Requirements already installed in this environment (delete")
+        print(f"   {stamp_file} to force reinstallation)")
+        return True
+    
     # Read requirements to show what will be installed
-    with open('requirements.txt', 'r') as f:
-        requirements = f.read().strip().split('\n')
+    requirements = read_requirements_bytes().decode('utf-8').strip().splitlines()
     
     print(f"📊 Will install {len(requirements)} packages:")
     for req in requirements[:10]:  # Show first 10
@@ -81,9 +156,10 @@ def install_requirements():
     try:
         # Upgrade pip first
         print("1. Upgrading pip...")
+        # Output is not inspected, so let pip write straight to the terminal/log
         result = subprocess.run([
             sys.executable, '-m', 'pip', 'install', '--upgrade', 'pip'
-        ], capture_output=True, text=True, timeout=300)
+        ], timeout=300)
         
         if result.returncode == 0:
             print("   ✅ pip upgraded successfully")
@@ -92,31 +168,61 @@ def install_requirements():
         
         # Install requirements
         print("2. Installing requirements...")
-        result = subprocess.run([
-            sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'
-        ], capture_output=True, text=True, timeout=1800)  # 30 minutes timeout
+        # pip's progress goes straight to the terminal; only stderr is written
+        # to a temporary file (not a PIPE), to classify failures below. The
+        # JSON report records what pip resolved, without a separate dry run.
+        use_report = pip_supports_report()
+        with tempfile.TemporaryDirectory() as report_dir:
+            report_path = os.path.join(report_dir, 'pip_report.json')
+            report_options = ['--report', report_path] if use_report else []
+            with tempfile.TemporaryFile() as pip_log:
+                result = subprocess.run([
+                    sys.executable, '-m', 'pip', 'install', *PIP_INSTALL_OPTIONS,
+                    *report_options, '-r', 'requirements.txt'
+                ], stderr=pip_log, timeout=1800)  # 30 minutes timeout
+                pip_log.seek(0)
+                pip_errors = pip_log.read().decode('utf-8', errors='replace')
+            resolved_packages = load_pip_report(report_path) if use_report else None
+        
+        # stderr was captured rather than shown, so show it once now
+        if pip_errors:
+            sys.stderr.write(pip_errors)
         
         if result.returncode == 0:
             print("   ✅ All requirements installed successfully!")
+            if resolved_packages is not None:
+                print(f"   📊 {len(resolved_packages)} package(s) installed or upgraded")
+            
+            # Record the successful install so later runs can skip pip
+            try:
+                stamp_file.parent.mkdir(parents=True, exist_ok=True)
+                stamp_file.touch()
+            except OSError as e:
+                print(f"   ⚠️  Could not write install stamp: {e}")
             
             # Show what was installed
-            if result.stdout:
-                lines = result.stdout.split('\n')
-                successful_installs = [line for line in lines if 'Successfully installed' in line]
-                if successful_installs:
-                    print("   📦 Installed packages:")
-                    for line in successful_installs[-3:]:  # Show last few
-                        print(f"      {line.strip()}")
+            if resolved_packages:
+                print("   📦 Installed packages:")
+                for name in resolved_packages[:10]:  # Show first 10
+                    print(f"      {name}")
+                if len(resolved_packages) > 10:
+                    print(f"      ... and {len(resolved_packages) - 10} more")
             
             return True
         else:
-            print("   ❌ Installation failed!")
-            print("\nError output:")
-            print(result.stderr)
+            print("   ❌ Installation failed! (see the pip output above)")
+            
+            if use_report:
+                if resolved_packages is None:
+                    print("\n📋 pip did not finish resolving dependencies")
+                    print("   (version conflict, or package metadata could not be downloaded)")
+                else:
+                    print(f"\n📋 Dependencies resolved, but installing {len(resolved_packages)} package(s) failed")
             
-            # Try to provide helpful suggestions
-            error_text = result.stderr.lower()
-            if 'libpython' in error_text and 'cannot open shared object file' in error_text:
+            # Try to provide helpful suggestions (from stderr only, so package
+            # names or URLs in the progress output cannot trigger a match)
+            error_causes = {m.lastindex for m in PIP_ERROR_PATTERNS.finditer(pip_errors)}
+            if LIBPYTHON_ERROR in error_causes:
                 print("\n💡 HPC Library Path Issue:")
                 print("   This is a common HPC issue. Try these steps:")
                 print("   1. module restore")
@@ -127,15 +233,15 @@ def install_requirements():
                 print("   ")
                 print("   Or try a different Python version:")
                 print("   module avail Python  # to see available versions")
-            elif 'no module named' in error_text:
+            elif MISSING_MODULE_ERROR in error_causes:
                 print("\n💡 Suggestions:")
                 print("   - Make sure you're in a virtual environment")
                 print("   - Try: source venv/bin/activate")
-            elif 'permission denied' in error_text:
+            elif PERMISSION_ERROR in error_causes:
                 print("\n💡 Suggestions:")
                 print("   - Check file permissions")
                 print("   - Make sure you have write access to the environment")
-            elif 'timeout' in error_text or 'connection' in error_text:
+            elif NETWORK_ERROR in error_causes:
                 print("\n💡 Suggestions:")
                 print("   - Check internet connection")
                 print("   - Try again (downloads can be slow on HPC)")
@@ -150,8 +256,14 @@ def install_requirements():
         print(f"   ❌ Installation error: {e}")
         return False
 
-def check_critical_imports():
-    """Check if critical packages can be imported."""
+def check_critical_imports(deep_check=False):
+    """Check if critical packages are installed.
+    
+    Presence is tested with importlib.util.find_spec, which locates each
+    package without executing it, so heavy libraries (torch, librosa) do not
+    pay their CUDA/MKL/numba start-up cost here. With deep_check=True, torch
+    is additionally imported in full to catch broken binary installs.
+    """
     print("\n🧪 Testing critical imports...")
     
     critical_packages = [
@@ -167,13 +279,20 @@ def check_critical_imports():
     success_count = 0
     
     for package in critical_packages:
-        try:
-            __import__(package)
+        if importlib.util.find_spec(package) is not None:
             print(f"   ✅ {package}")
             success_count += 1
-        except ImportError:
+        else:
             print(f"   ❌ {package}")
     
+    if deep_check and importlib.util.find_spec('torch') is not None:
+        try:
+            importlib.import_module('torch')
+            print("   ✅ torch imported successfully (deep check)")
+        except Exception as e:
+            print(f"   ❌ torch is installed but failed to import: {e}")
+            success_count -= 1
+    
     print(f"\n📊 Import test: {success_count}/{len(critical_packages)} packages working")
     
     if success_count == len(critical_packages):
@@ -194,7 +313,7 @@ def setup_pyannote_optional():
     print("\nYou can skip this and run 'python setup_pyannote.py' later.")
     print()
     
-    response = input("Set up speaker attribution now? (y/N): ").strip().lower()
+    response = ask("Set up speaker attribution now? (y/N): ")
     
     if response == 'y':
         print("\n🚀 Running pyannote setup wizard...")
@@ -225,6 +344,11 @@ def setup_pyannote_optional():
 
 def main():
     """Main installation function."""
+    parser = argparse.ArgumentParser(description='Install speech transcription dependencies')
+    parser.add_argument('--deep-check', action='store_true',
+                       help='Fully import torch after installation instead of only checking that packages are present')
+    args = parser.parse_args()
+    
     print("Welcome to HPC Speech Transcription Setup!")
     print()
     
@@ -237,7 +361,7 @@ def main():
         print("   source venv/bin/activate")
         print()
         
-        response = input("Continue anyway? (y/N): ").strip().lower()
+        response = ask("Continue anyway? (y/N): ")
         if response != 'y':
             print("Setup cancelled. Set up virtual environment first.")
             return
@@ -247,7 +371,7 @@ def main():
     
     if install_success:
         # Test imports
-        import_success = check_critical_imports()
+        import_success = check_critical_imports(deep_check=args.deep_check)
         
         if import_success:
             # Offer to set up pyannote
@@ -15,9 +15,35 @@ Run this ONCE during initial setup to ensure speaker attribution works.
 """
 
 import os
+import re
 import sys
+import time
+import importlib
+import importlib.util
+from importlib import metadata
 from pathlib import Path
 
+from setup_utils import PIP_INSTALL_OPTIONS, ask, get_stamp_path, is_interactive
+
+# Timeout (seconds) and number of attempts for the model access check
+MODEL_INFO_TIMEOUT = 10
+MODEL_INFO_ATTEMPTS = 3
+
+
+
+def get_pyannote_stamp_path():
+    """Return the stamp for the pyannote.audio version installed in this environment.
+    
+    The stamp is written once the models have been downloaded, so later runs
+    can skip the slow pyannote.audio import (torch, torchaudio, lightning) in
+    step 1. Returns None when pyannote.audio is not installed.
+    """
+    try:
+        version = metadata.version('pyannote.audio')
+    except metadata.PackageNotFoundError:
+        return None
+    return get_stamp_path('pyannote', version.encode())
+
 
 def print_header(text):
     """Print a formatted header."""
@@ -37,6 +63,19 @@ def check_pyannote_installed():
     """Check if pyannote.audio is installed."""
     print_step(1, "Checking pyannote.audio installation")
     
+    # A stamp newer than the installed package means a previous run already
+    # verified this installation; find_spec only scans sys.path, no import
+    try:
+        spec = importlib.util.find_spec('pyannote.audio')
+    except ImportError:
+        spec = None
+    stamp_file = get_pyannote_stamp_path() if spec is not None and spec.origin else None
+    if stamp_file is not None and stamp_file.exists():
+        if stamp_file.stat().st_mtime > os.path.getmtime(spec.origin):
+            version = metadata.version('pyannote.audio')
+            print(f"✅ pyannote.audio is installed (version {version}, verified previously)")
+            return True
+    
     try:
         import pyannote.audio
         version = pyannote.audio.__version__
@@ -47,6 +86,30 @@ def check_pyannote_installed():
         return False
 
 
+def is_requirement_satisfied(requirement):
+    """Return True if an installed distribution already satisfies a requirement string."""
+    try:
+        from packaging.requirements import Requirement
+    except ImportError:
+        Requirement = None
+    
+    if Requirement is not None:
+        req = Requirement(requirement)
+        name = req.name
+    else:
+        name = re.split(r'[<>=!~;\[ ]', requirement, maxsplit=1)[0]
+    
+    try:
+        installed_version = metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return False
+    
+    if Requirement is None:
+        # Without packaging the version constraint cannot be checked
+        return True
+    return req.specifier.contains(installed_version, prereleases=True)
+
+
 def install_pyannote():
     """Install pyannote.audio and dependencies."""
     print("\nInstalling pyannote.audio and required dependencies...")
@@ -59,7 +122,7 @@ def install_pyannote():
         print("On HPC: Make sure you've activated the environment:")
         print("  source activate_project_env.sh")
         print("\nInstallation will use system/user site-packages.")
-        response = input("Continue anyway? (y/N): ").strip().lower()
+        response = ask("Continue anyway? (y/N): ")
         if response != 'y':
             return False
     
@@ -72,35 +135,45 @@ def install_pyannote():
         "speechbrain>=0.5.14",
     ]
     
+    # Only install what is missing or too old: on HPC the module-provided,
+    # CUDA-matched torch build should not be replaced by a PyPI wheel
+    already_installed = [p for p in packages if is_requirement_satisfied(p)]
+    packages = [p for p in dict.fromkeys(packages) if p not in already_installed]
+    for package in already_installed:
+        print(f"✅ {package} already satisfied - skipping")
+    if not packages:
+        print("\n✅ All packages already installed!")
+        return True
+    
     try:
-        for package in packages:
-            print(f"Installing {package}...")
-            # Use python -m pip to ensure it installs into the active environment
-            # NOT using --user flag to avoid personal space on HPC
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "install", package],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode != 0:
-                print(f"⚠️  Warning: {package} installation had issues")
-                print(result.stderr[:500])  # Show first 500 chars of error
-            else:
-                print(f"✅ {package} installed successfully")
-        
-        print("\n✅ All packages installed!")
-        
-        # Show where packages were installed
+        print(f"Installing {', '.join(packages)}...")
+        # Install everything in one pip call so the resolver sees all
+        # constraints at once and shared dependencies (torch, numpy) are
+        # only resolved and downloaded once
+        # Use python -m pip to ensure it installs into the active environment
+        # NOT using --user flag to avoid personal space on HPC
         result = subprocess.run(
-            [sys.executable, "-m", "pip", "show", "pyannote.audio"],
+            [sys.executable, "-m", "pip", "install", *PIP_INSTALL_OPTIONS, *packages],
             capture_output=True,
             text=True
         )
-        if result.returncode == 0:
-            for line in result.stdout.split('\n'):
-                if line.startswith('Location:'):
-                    print(f"   Installed to: {line.split(':', 1)[1].strip()}")
-                    break
+        if result.returncode != 0:
+            print("⚠️  Warning: package installation had issues")
+            print(result.stderr[:500])  # Show first 500 chars of error
+            return False
+        
+        print("\n✅ All packages installed!")
+        
+        # Show where packages were installed (located on sys.path rather than
+        # via a second 'pip show' interpreter start-up)
+        importlib.invalidate_caches()
+        try:
+            spec = importlib.util.find_spec('pyannote.audio')
+        except ImportError:
+            spec = None
+        if spec is not None and spec.origin:
+            # .../site-packages/pyannote/audio/__init__.py -> site-packages
+            print(f"   Installed to: {Path(spec.origin).parents[2]}")
         
         return True
         
@@ -111,13 +184,22 @@ def install_pyannote():
         return False
 
 
+# Token resolved by get_hf_token(), kept for the rest of the process
+_TOKEN_CACHE = None
+
+
 def get_hf_token():
-    """Get HuggingFace token from various sources."""
+    """Get HuggingFace token from various sources (read once per process)."""
+    global _TOKEN_CACHE
+    if _TOKEN_CACHE:
+        return _TOKEN_CACHE
+    
     # Check environment variables
     token = os.environ.get('HF_TOKEN') or os.environ.get('HUGGINGFACE_TOKEN')
     
     if token:
-        return token.strip()
+        _TOKEN_CACHE = token.strip()
+        return _TOKEN_CACHE
     
     # Check token file
     token_file = Path(__file__).parent / 'hf_token.txt'
@@ -125,6 +207,7 @@ def get_hf_token():
         with open(token_file, 'r') as f:
             token = f.read().strip()
             if token:
+                _TOKEN_CACHE = token
                 return token
     
     return None
@@ -132,13 +215,14 @@ def get_hf_token():
 
 def setup_hf_token():
     """Interactive HuggingFace token setup."""
+    global _TOKEN_CACHE
     print_step(2, "HuggingFace Token Setup")
     
     # Check if token already exists
     existing_token = get_hf_token()
     if existing_token:
         print(f"✅ HuggingFace token found: {existing_token[:8]}...")
-        response = input("\nUse existing token? (y/n): ").strip().lower()
+        response = ask("\nUse existing token? (y/n): ", default='y')
         if response == 'y':
             return existing_token
     
@@ -156,7 +240,10 @@ def setup_hf_token():
     
     # Get token from user
     print("\n" + "─" * 70)
-    token = input("Enter your HuggingFace token (or press Enter to skip): ").strip()
+    if is_interactive():
+        token = input("Enter your HuggingFace token (or press Enter to skip): ").strip()
+    else:
+        token = ""
     
     if not token:
         print("\n⚠️  Skipped token setup")
@@ -172,12 +259,24 @@ def setup_hf_token():
     # Save token to file
     token_file = Path(__file__).parent / 'hf_token.txt'
     try:
-        with open(token_file, 'w') as f:
-            f.write(token)
+        # Owner-only permissions: on shared HPC filesystems the default 0o644
+        # would let other users read the token
+        fd = os.open(token_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            # The mode above only applies to a new file; tighten a pre-existing
+            # one before the token is written into it
+            if hasattr(os, 'fchmod'):
+                os.fchmod(fd, 0o600)
+            else:
+                os.chmod(token_file, 0o600)
+            os.write(fd, token.encode('utf-8'))
+        finally:
+            os.close(fd)
         print(f"\n✅ Token saved to: {token_file}")
         
         # Also set environment variable for current session
         os.environ['HF_TOKEN'] = token
+        _TOKEN_CACHE = token
         print("✅ Token set for current session")
         
     except Exception as e:
@@ -201,31 +300,40 @@ def verify_model_access(token):
         from huggingface_hub import HfApi
         api = HfApi()
         
-        # Try to access the model info
+        # Try to access the model info. Each attempt has a short timeout so a
+        # stalled proxy/DNS lookup on HPC fails within seconds, not minutes
         model_id = "pyannote/speaker-diarization-3.1"
-        try:
-            info = api.model_info(model_id, token=token)
-            print(f"✅ Access confirmed to {model_id}")
-            return True
-        except Exception as e:
-            error_str = str(e).lower()
-            if 'gated' in error_str or 'access' in error_str or '401' in error_str or '403' in error_str:
-                print(f"\n❌ Model access denied!")
-                print("\nYou need to accept the model licence:")
-                print(f"  1. Visit: https://huggingface.co/{model_id}")
-                print("  2. Click 'Agree and access repository'")
-                print("  3. Also visit: https://huggingface.co/pyannote/segmentation-3.0")
-                print("  4. Click 'Agree and access repository' there too")
-                print("\nAfter accepting, run this script again.")
-                return False
-            else:
-                print(f"⚠️  Unexpected error: {e}")
-                return False
+        for attempt in range(1, MODEL_INFO_ATTEMPTS + 1):
+            try:
+                info = api.model_info(model_id, token=token, timeout=MODEL_INFO_TIMEOUT)
+                print(f"✅ Access confirmed to {model_id}")
+                return True
+            except Exception as e:
+                # Connection failures and timeouts carry no HTTP response
+                is_network_error = isinstance(e, OSError) and getattr(e, 'response', None) is None
+                if is_network_error and attempt < MODEL_INFO_ATTEMPTS:
+                    print(f"⚠️  Could not reach HuggingFace (attempt {attempt}/{MODEL_INFO_ATTEMPTS}), retrying...")
+                    time.sleep(2 ** attempt)
+                    continue
+                
+                error_str = str(e).lower()
+                if 'gated' in error_str or 'access' in error_str or '401' in error_str or '403' in error_str:
+                    print(f"\n❌ Model access denied!")
+                    print("\nYou need to accept the model licence:")
+                    print(f"  1. Visit: https://huggingface.co/{model_id}")
+                    print("  2. Click 'Agree and access repository'")
+                    print("  3. Also visit: https://huggingface.co/pyannote/segmentation-3.0")
+                    print("  4. Click 'Agree and access repository' there too")
+                    print("\nAfter accepting, run this script again.")
+                    return False
+                else:
+                    print(f"⚠️  Unexpected error: {e}")
+                    return False
         
     except ImportError:
         print("Installing huggingface_hub...")
         import subprocess
-        subprocess.run([sys.executable, "-m", "pip", "install", "huggingface_hub"])
+        subprocess.run([sys.executable, "-m", "pip", "install", *PIP_INSTALL_OPTIONS, "huggingface_hub"])
         print("Please run this script again.")
         return False
 
@@ -277,27 +385,39 @@ def test_pyannote_functionality(token):
         print("❌ No token available - skipping functionality test")
         return False
     
-    print("Creating a test audio file...")
-    
+    # Check dependencies before doing any work: the cheap audio libraries
+    # first, then the slow pyannote import, so a missing package fails fast
+    # instead of after a test file has been written
     try:
         import numpy as np
         import soundfile as sf
-        from pathlib import Path
-        
+    except ImportError as e:
+        print(f"❌ Missing audio library: {e}")
+        print("Install it with: pip install numpy soundfile")
+        return False
+    
+    try:
+        from pyannote.audio import Pipeline
+    except ImportError as e:
+        print(f"❌ pyannote.audio could not be imported: {e}")
+        return False
+    
+    print("Creating a test audio file...")
+    
+    try:
         # Create a simple test audio (1 second of silence at 16kHz)
         sample_rate = 16000
         duration = 1.0
-        audio_data = np.zeros(int(sample_rate * duration))
+        # Silence needs no dynamic range: int16 is written as PCM_16 without conversion
+        audio_data = np.zeros(int(sample_rate * duration), dtype=np.int16)
         
         test_audio_path = Path(__file__).parent / "test_pyannote.wav"
-        sf.write(test_audio_path, audio_data, sample_rate)
+        sf.write(test_audio_path, audio_data, sample_rate, subtype='PCM_16')
         
         print(f"✅ Test audio created: {test_audio_path}")
         
         # Test pyannote
         print("\nRunning pyannote pipeline on test audio...")
-        from pyannote.audio import Pipeline
-        
         pipeline = Pipeline.from_pretrained(
             "pyannote/speaker-diarization-3.1",
             use_auth_token=token
@@ -384,14 +504,15 @@ def main():
     print("  4. Model download and caching")
     print("  5. Functionality testing")
     
-    input("\nPress Enter to begin...")
+    if is_interactive():
+        input("\nPress Enter to begin...")
     
     results = {}
     
     # Step 1: Check/install pyannote
     is_installed = check_pyannote_installed()
     if not is_installed:
-        response = input("\nInstall pyannote.audio now? (y/n): ").strip().lower()
+        response = ask("\nInstall pyannote.audio now? (y/n): ")
         if response == 'y':
             is_installed = install_pyannote()
     
@@ -423,6 +544,14 @@ def main():
     is_cached = download_and_cache_models(token)
     results['cached'] = is_cached
     
+    stamp_file = get_pyannote_stamp_path() if is_cached else None
+    if stamp_file is not None:
+        try:
+            stamp_file.parent.mkdir(parents=True, exist_ok=True)
+            stamp_file.touch()
+        except OSError:
+            pass
+    
     if not is_cached:
         print_summary(results)
         return
@@ -0,0 +1,55 @@
+"""
+Helpers shared by the setup scripts (install_requirements.py and
+setup_pyannote.py), so prompts, pip settings and stamp files behave the same
+in both.
+"""
+
+import hashlib
+import os
+import platform
+import sys
+from pathlib import Path
+
+# Network settings for pip: HPC login nodes often stall on PyPI downloads,
+# so allow longer socket timeouts and more retries than pip's defaults
+PIP_INSTALL_OPTIONS = [
+    '--retries', os.environ.get('PIP_RETRIES', '8'),
+    '--timeout', os.environ.get('PIP_TIMEOUT', '120'),
+    '--no-input',
+    '--progress-bar', 'off',
+]
+
+# Stamp files recording successful setup steps, so re-running setup in an
+# unchanged environment can skip them
+CACHE_DIR = Path.home() / '.cache' / 'speech_transcription'
+
+
+def get_stamp_path(prefix, key_data):
+    """Return a stamp file for key_data in this Python, platform and environment.
+
+    The interpreter version, platform and sys.prefix are part of the key, so a
+    stamp written in one venv or conda env is never picked up by another.
+    """
+    key_data += sys.version.encode() + platform.platform().encode() + sys.prefix.encode()
+    key = hashlib.sha256(key_data).hexdigest()
+    return CACHE_DIR / f"{prefix}_{key}.stamp"
+
+
+def is_interactive():
+    """Return True when a user can answer prompts on stdin."""
+    return sys.stdin is not None and sys.stdin.isatty()
+
+
+def ask(prompt, default='n'):
+    """Ask a yes/no question, answering with a default when non-interactive.
+
+    Batch jobs (e.g. Slurm) have no terminal on stdin, so a plain input()
+    would block until the job hits its wallclock limit. Set
+    TRANSCRIPTION_ASSUME_YES=1 to answer 'y' to every question.
+    """
+    if os.environ.get('TRANSCRIPTION_ASSUME_YES'):
+        return 'y'
+    if not is_interactive():
+        print(f"{prompt.strip()} {default} (non-interactive default)")
+        return default
+    return input(prompt).strip().lower()
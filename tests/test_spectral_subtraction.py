@@ -0,0 +1,40 @@
+"""Tests for the block-wise CPU spectral subtraction in transcription.py."""
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+librosa = pytest.importorskip("librosa")
+pytest.importorskip("torch")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import transcription
+
+
+def whole_signal_subtraction(audio, sr, alpha=2.0):
+    """Reference: spectral subtraction over a single STFT of the whole signal."""
+    stft = librosa.stft(audio, n_fft=2048, hop_length=512, dtype=np.complex64)
+    magnitude = np.abs(stft)
+    noise_magnitude = np.mean(magnitude[:, :int(0.5 * sr / 512)], axis=1, keepdims=True)
+    clean_magnitude = np.maximum(magnitude - alpha * noise_magnitude, 0.1 * magnitude)
+    return librosa.istft(clean_magnitude * np.exp(1j * np.angle(stft)), hop_length=512, n_fft=2048)
+
+
+@pytest.mark.parametrize("use_numba", [False, True])
+def test_multi_block_input_matches_whole_signal(monkeypatch, use_numba):
+    if use_numba and not transcription.NUMBA_AVAILABLE:
+        pytest.skip("numba not installed")
+    monkeypatch.setattr(transcription, "NUMBA_AVAILABLE", use_numba)
+
+    # 75 seconds spans three 30-second blocks, so the middle block has a
+    # margin on both sides and is longer than the first one
+    sr = 16000
+    rng = np.random.default_rng(0)
+    audio = (0.1 * rng.standard_normal(75 * sr)).astype(np.float32)
+
+    result = transcription.spectral_subtraction_cpu(audio, sr)
+    expected = whole_signal_subtraction(audio, sr)
+
+    assert result.shape == expected.shape
+    np.testing.assert_allclose(result, expected, atol=1e-5)
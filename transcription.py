@@ -16,7 +16,9 @@ import argparse
 from pathlib import Path
 import textwrap
 from datetime import datetime
+from functools import lru_cache
 import warnings
+import importlib.util
 import csv
 import urllib.request
 import json
@@ -54,14 +56,87 @@ if AUDIO_LIBS_AVAILABLE:
     except ImportError:
         print("Warning: imageio_ffmpeg not available")
 
-# Transformers import - also conditional
+# Threads for FFTs: the CPUs this process may run on (the Slurm allocation on HPC)
+if hasattr(os, 'sched_getaffinity'):
+    FFT_WORKERS = len(os.sched_getaffinity(0))
+else:
+    FFT_WORKERS = os.cpu_count() or 1
+
+# Use FFTW for librosa's STFT/ISTFT when pyFFTW is installed (optional);
+# plans are cached so repeated transforms of the same size reuse them.
+# Otherwise use scipy.fft (a librosa dependency), which unlike numpy.fft can
+# split each batch of frames across threads
+PYFFTW_AVAILABLE = False
+if AUDIO_LIBS_AVAILABLE:
+    import scipy.fft
+    try:
+        import pyfftw
+        pyfftw.interfaces.cache.enable()
+        pyfftw.interfaces.cache.set_keepalive_time(30)
+        pyfftw.config.NUM_THREADS = FFT_WORKERS
+        librosa.set_fftlib(pyfftw.interfaces.numpy_fft)
+        PYFFTW_AVAILABLE = True
+    except ImportError:
+        librosa.set_fftlib(scipy.fft)
+
+# Numba (installed with librosa) fuses the spectral-subtraction arithmetic
+# into one pass over the STFT; NumPy is used when it is unavailable
+NUMBA_AVAILABLE = False
+if AUDIO_LIBS_AVAILABLE:
+    try:
+        from numba import njit, prange
+        NUMBA_AVAILABLE = True
+    except ImportError:
+        pass
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _apply_spectral_gain(stft, noise_floor, min_gain):
+        """Scale each STFT bin in place by max(1 - noise_floor / |X|, min_gain)."""
+        n_bins, n_frames = stft.shape
+        for t in prange(n_frames):
+            for f in range(n_bins):
+                z = stft[f, t]
+                m = abs(z)
+                if m > 0:
+                    g = 1.0 - noise_floor[f] / m
+                    if g < min_gain:
+                        g = min_gain
+                    stft[f, t] = z * g
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _compress_in_place(audio, threshold, ratio, peak_limit):
+        """Compress levels above threshold by ratio, then scale so the peak is at most peak_limit."""
+        n = audio.shape[0]
+        peak = 0.0
+        for i in prange(n):
+            peak = max(peak, abs(audio[i]))
+        # Compression is monotonic, so the compressed peak follows from the original one
+        if peak > threshold:
+            peak = threshold + (peak - threshold) / ratio
+        scale = peak_limit / peak if peak > peak_limit else 1.0
+
+        for i in prange(n):
+            x = audio[i]
+            a = abs(x)
+            if a > threshold:
+                a = threshold + (a - threshold) / ratio
+            a *= scale
+            audio[i] = a if x >= 0 else -a
+
+# Transformers - also conditional. Only transcription needs it, so it is
+# imported there on first use rather than for every import of this module
+TRANSFORMERS_AVAILABLE = importlib.util.find_spec("transformers") is not None
+if not TRANSFORMERS_AVAILABLE:
+    print("Warning: transformers not available - transcription disabled")
+
+# RE2 (optional) matches the large word-table cleaning patterns in linear time
 try:
-    from transformers import pipeline
-    TRANSFORMERS_AVAILABLE = True
+    import re2
+    RE2_AVAILABLE = True
 except ImportError:
-    print("Warning: transformers not available - transcription disabled")
-    TRANSFORMERS_AVAILABLE = False
-    pipeline = None
+    RE2_AVAILABLE = False
+    re2 = None
 
 # Enhanced name masking with global database and logging
 # Enhanced name masking with global database and logging
@@ -184,9 +259,12 @@ def load_global_names(use_facebook_names=False, use_facebook_surnames=False, sel
             nd = NameDataset()
             print("   ✅ Names-dataset package loaded successfully")
             
-            # Extract first names and surnames based on flags
+            # Extract first names and surnames based on flags; names are
+            # filtered as they are extracted, and the raw counts kept for reporting
             all_first_names = set()
             all_surnames = set()
+            raw_first_count = 0
+            raw_surname_count = 0
             
             # Load first names if requested
             if use_facebook_names and hasattr(nd, 'first_names'):
@@ -194,9 +272,10 @@ def load_global_names(use_facebook_names=False, use_facebook_surnames=False, sel
                     print("   Loading first names dictionary...")
                     names_dict = nd.first_names
                     if isinstance(names_dict, dict):
-                        # The keys are the actual names
-                        all_first_names.update(name.lower().strip() for name in names_dict.keys() if name.strip())
-                        print(f"   ✅ Extracted {len(all_first_names)} first names")
+                        # The keys are the actual names; normalise and filter them in one pass
+                        all_first_names = filter_problematic_names(name.strip().lower() for name in names_dict)
+                        raw_first_count = len(names_dict)
+                        print(f"   ✅ Extracted {raw_first_count} first names")
                     else:
                         print(f"   ⚠️  first_names is not a dictionary: {type(names_dict)}")
                 except Exception as e:
@@ -210,9 +289,10 @@ def load_global_names(use_facebook_names=False, use_facebook_surnames=False, sel
                     print("   Loading surnames dictionary...")
                     surnames_dict = nd.last_names
                     if isinstance(surnames_dict, dict):
-                        # The keys are the actual surnames
-                        all_surnames.update(name.lower().strip() for name in surnames_dict.keys() if name.strip())
-                        print(f"   ✅ Extracted {len(all_surnames)} surnames")
+                        # The keys are the actual surnames; normalise and filter them in one pass
+                        all_surnames = filter_problematic_names(name.strip().lower() for name in surnames_dict)
+                        raw_surname_count = len(surnames_dict)
+                        print(f"   ✅ Extracted {raw_surname_count} surnames")
                     else:
                         print(f"   ⚠️  last_names is not a dictionary: {type(surnames_dict)}")
                 except Exception as e:
@@ -254,6 +334,9 @@ def load_global_names(use_facebook_names=False, use_facebook_surnames=False, sel
                                         all_first_names.update(name.lower() for name in value)
                     except Exception as e:
                         print(f"   data attribute failed: {e}")
+                
+                raw_first_count = len(all_first_names)
+                all_first_names = filter_problematic_names(all_first_names)
             
             # Check if we successfully extracted the requested data
             names_loaded = (not use_facebook_names) or len(all_first_names) > 100
@@ -261,11 +344,11 @@ def load_global_names(use_facebook_names=False, use_facebook_surnames=False, sel
             
             if names_loaded and surnames_loaded:
                 print(f"   ✅ FACEBOOK DATABASE LOADED SUCCESSFULLY")
-                print(f"   📊 Raw extraction: {len(all_first_names)} first names, {len(all_surnames)} surnames")
+                print(f"   📊 Raw extraction: {raw_first_count} first names, {raw_surname_count} surnames")
                 
-                # Apply filtering to both sets (only if they were loaded)
-                filtered_first_names = filter_problematic_names(all_first_names) if use_facebook_names else set()
-                filtered_surnames = filter_problematic_names(all_surnames) if use_facebook_surnames else set()
+                # Both sets were filtered during extraction (only if they were loaded)
+                filtered_first_names = all_first_names if use_facebook_names else set()
+                filtered_surnames = all_surnames if use_facebook_surnames else set()
                 
                 # Merge with curated multilingual names for the types not requested from Facebook
                 if not use_facebook_names or not use_facebook_surnames:
@@ -277,9 +360,9 @@ def load_global_names(use_facebook_names=False, use_facebook_surnames=False, sel
                 
                 print(f"   [INFO] Final counts: {len(filtered_first_names)} first names, {len(filtered_surnames)} surnames")
                 if use_facebook_names:
-                    print(f"   [REMOVED] {len(all_first_names) - len(filtered_first_names)} common first names")
+                    print(f"   [REMOVED] {raw_first_count - len(filtered_first_names)} common first names")
                 if use_facebook_surnames:
-                    print(f"   [REMOVED] {len(all_surnames) - len(filtered_surnames)} common surnames")
+                    print(f"   [REMOVED] {raw_surname_count - len(filtered_surnames)} common surnames")
                 
                 # Return both sets as a tuple
                 return filtered_first_names, filtered_surnames
@@ -312,141 +395,137 @@ def download_name_database():
     print("   Note: Using names-dataset package instead of direct download")
     return None
 
+# Comprehensive list of common English words that should not be masked
+COMMON_WORDS = frozenset({
+    # Colors
+    'red', 'blue', 'green', 'yellow', 'orange', 'purple', 'pink', 'brown', 'black', 'white', 'grey', 'gray',
+    'violet', 'rose', 'lily', 'amber', 'jade', 'ruby', 'pearl', 'ivory', 'silver', 'golden',
+    
+    # Months/Time
+    'january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec',
+    'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday',
+    'morning', 'evening', 'dawn', 'dusk',
+    
+    # Common verbs/actions
+    'will', 'can', 'may', 'might', 'shall', 'should', 'would', 'could',
+    'go', 'come', 'run', 'walk', 'talk', 'see', 'hear', 'feel', 'think',
+    'hope', 'wish', 'want', 'need', 'have', 'get', 'make', 'take', 'give',
+    'work', 'play', 'read', 'write', 'draw', 'paint', 'sing', 'dance',
+    
+    # Common nouns
+    'house', 'home', 'car', 'book', 'phone', 'computer', 'table', 'chair', 'door', 'window',
+    'water', 'food', 'money', 'time', 'day', 'night', 'week', 'month', 'year',
+    'man', 'woman', 'child', 'person', 'people', 'family', 'friend',
+    'school', 'work', 'job', 'office', 'shop', 'store', 'market',
+    'hill', 'valley', 'river', 'lake', 'sea', 'ocean', 'mountain', 'forest', 'field',
+    'stone', 'rock', 'wood', 'tree', 'flower', 'grass', 'leaf',
+    
+    # Common adjectives
+    'good', 'bad', 'big', 'small', 'long', 'short', 'tall', 'wide', 'narrow',
+    'hot', 'cold', 'warm', 'cool', 'dry', 'wet', 'clean', 'dirty',
+    'new', 'old', 'young', 'fast', 'slow', 'hard', 'soft', 'strong', 'weak',
+    'happy', 'sad', 'angry', 'calm', 'quiet', 'loud', 'bright', 'dark',
+    'rich', 'poor', 'free', 'busy', 'easy', 'hard', 'simple', 'difficult',
+    
+    # Occupations/Titles
+    'doctor', 'nurse', 'teacher', 'student', 'worker', 'manager', 'director',
+    'cook', 'baker', 'farmer', 'driver', 'pilot', 'captain', 'judge',
+    'artist', 'writer', 'singer', 'actor', 'player', 'hunter', 'fisher',
+    'mason', 'taylor', 'turner', 'walker', 'parker', 'porter', 'carter',
+    
+    # Geographic/Place terms
+    'north', 'south', 'east', 'west', 'center', 'middle', 'top', 'bottom',
+    'city', 'town', 'village', 'country', 'state', 'place', 'area', 'region',
+    'street', 'road', 'avenue', 'lane', 'way', 'path', 'bridge', 'park',
+    'church', 'temple', 'hall', 'tower', 'castle', 'palace',
+    'island', 'beach', 'shore', 'coast', 'port', 'bay', 'gulf',
+    
+    # Animals
+    'cat', 'dog', 'bird', 'fish', 'horse', 'cow', 'pig', 'sheep', 'goat',
+    'lion', 'tiger', 'bear', 'wolf', 'fox', 'deer', 'rabbit', 'mouse',
+    'bee', 'ant', 'fly', 'spider', 'snake', 'frog', 'duck', 'swan',
+    
+    # Body parts
+    'head', 'face', 'eye', 'ear', 'nose', 'mouth', 'hand', 'foot', 'arm', 'leg',
+    'heart', 'brain', 'bone', 'skin', 'hair', 'nail',
+    
+    # Common words that are often names
+    'angel', 'joy', 'grace', 'faith', 'hope', 'charity', 'patience', 'mercy',
+    'peace', 'love', 'dream', 'wish', 'star', 'moon', 'sun', 'sky',
+    'rain', 'snow', 'wind', 'storm', 'thunder', 'lightning',
+    
+    # Misc common words
+    'name', 'names', 'word', 'letter', 'number', 'page', 'line', 'text',
+    'picture', 'image', 'photo', 'video', 'music', 'song', 'sound', 'voice',
+    'game', 'sport', 'team', 'player', 'winner', 'loser', 'score', 'point',
+    'question', 'answer', 'problem', 'solution', 'idea', 'plan', 'goal',
+    'start', 'end', 'begin', 'finish', 'stop', 'pause', 'continue',
+    'yes', 'no', 'maybe', 'never', 'always', 'sometimes', 'often', 'rarely',
+    
+    # Single letters that might be names
+    'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm',
+    'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z',
+    
+    # Common conversation words
+    'the', 'okay', 'yeah', 'well', 'but', 'move', 'thank', 'thanks', 'please',
+    'sorry', 'excuse', 'hello', 'hi', 'bye', 'goodbye', 'welcome', 'congrats',
+    'um', 'uh', 'oh', 'ah', 'hmm', 'wow', 'great', 'nice', 'fine', 'sure',
+    'actually', 'really', 'basically', 'obviously', 'definitely', 'probably',
+    'maybe', 'perhaps', 'anyway', 'however', 'therefore', 'because', 'since',
+    'although', 'though', 'unless', 'until', 'while', 'during', 'before', 'after',
+    
+    # Additional problematic words
+    'whale', 'whales', 'look', 'let', 'lets', 'every', 'put', 'nor', 'did', 'wave',
+    'wait', 'mummy', 'baby', 'lots', 'lovely', 'say', 'painting', 'shower', 'nowhere',
+    'pardon', 'breakfast', 'bible', 'wayo', 'shovel', 'shadows', 'meow', 'noy',
+    
+    # Question words and pronouns
+    'what', 'who', 'when', 'where', 'why', 'how', 'which', 'whose',
+    'he', 'she', 'it', 'they', 'we', 'you', 'i', 'me', 'him', 'her', 'them', 'us',
+    'this', 'that', 'these', 'those', 'here', 'there', 'now', 'then',
+    'some', 'any', 'all', 'each', 'every', 'many', 'much', 'few', 'little',
+    
+    # Prepositions and conjunctions 
+    'in', 'on', 'at', 'by', 'for', 'with', 'without', 'to', 'from', 'of',
+    'about', 'above', 'below', 'under', 'over', 'through', 'between', 'among',
+    'and', 'or', 'but', 'so', 'if', 'as', 'than', 'like', 'unlike',
+    
+    # Common verbs that might appear as names
+    'do', 'does', 'did', 'be', 'am', 'is', 'are', 'was', 'were', 'been', 'being',
+    'have', 'has', 'had', 'having', 'get', 'got', 'getting', 'put', 'putting',
+    'say', 'said', 'saying', 'tell', 'told', 'telling', 'ask', 'asked', 'asking',
+    'know', 'knew', 'known', 'knowing', 'think', 'thought', 'thinking',
+    'look', 'looked', 'looking', 'seem', 'seemed', 'seeming', 'try', 'tried', 'trying',
+    
+    # Common contractions (without apostrophes since they're stripped in processing)
+    'hes', 'shes', 'its', 'thats', 'whats', 'wheres', 'theres', 'youre', 'theyre',
+    'were', 'werent', 'cant', 'dont', 'wont', 'isnt', 'arent', 'wasnt', 'havent', 'hasnt', 'hadnt',
+    'ill', 'youll', 'hell', 'shell', 'well', 'theyll', 'ive', 'youve', 'weve', 'theyve',
+    'id', 'youd', 'hed', 'shed', 'wed', 'theyd', 'lets', 'theres', 'heres',
+    
+    # Numbers and quantities
+    'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
+    'first', 'second', 'third', 'fourth', 'fifth', 'last', 'next', 'another',
+    'more', 'most', 'less', 'least', 'enough', 'too', 'very', 'quite', 'rather',
+    
+    # Technology and modern words
+    'app', 'web', 'site', 'email', 'text', 'call', 'chat', 'post', 'like', 'share',
+    'click', 'tap', 'swipe', 'scroll', 'zoom', 'search', 'find', 'save', 'delete',
+    'update', 'download', 'upload', 'install', 'connect', 'wifi', 'internet',
+    
+    # Business and finance
+    'buy', 'sell', 'pay', 'cost', 'price', 'cheap', 'expensive', 'free', 'sale',
+    'deal', 'offer', 'discount', 'tax', 'fee', 'bill', 'check', 'cash', 'card',
+    'bank', 'account', 'loan', 'debt', 'invest', 'profit', 'loss', 'budget'
+})
+
 def filter_problematic_names(names):
     """Remove names that coincide with common English words."""
     
-    # Comprehensive list of common English words that should not be masked
-    common_words = {
-        # Colors
-        'red', 'blue', 'green', 'yellow', 'orange', 'purple', 'pink', 'brown', 'black', 'white', 'grey', 'gray',
-        'violet', 'rose', 'lily', 'amber', 'jade', 'ruby', 'pearl', 'ivory', 'silver', 'golden',
-        
-        # Months/Time
-        'january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december',
-        'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec',
-        'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday',
-        'morning', 'evening', 'dawn', 'dusk',
-        
-        # Common verbs/actions
-        'will', 'can', 'may', 'might', 'shall', 'should', 'would', 'could',
-        'go', 'come', 'run', 'walk', 'talk', 'see', 'hear', 'feel', 'think',
-        'hope', 'wish', 'want', 'need', 'have', 'get', 'make', 'take', 'give',
-        'work', 'play', 'read', 'write', 'draw', 'paint', 'sing', 'dance',
-        
-        # Common nouns
-        'house', 'home', 'car', 'book', 'phone', 'computer', 'table', 'chair', 'door', 'window',
-        'water', 'food', 'money', 'time', 'day', 'night', 'week', 'month', 'year',
-        'man', 'woman', 'child', 'person', 'people', 'family', 'friend',
-        'school', 'work', 'job', 'office', 'shop', 'store', 'market',
-        'hill', 'valley', 'river', 'lake', 'sea', 'ocean', 'mountain', 'forest', 'field',
-        'stone', 'rock', 'wood', 'tree', 'flower', 'grass', 'leaf',
-        
-        # Common adjectives
-        'good', 'bad', 'big', 'small', 'long', 'short', 'tall', 'wide', 'narrow',
-        'hot', 'cold', 'warm', 'cool', 'dry', 'wet', 'clean', 'dirty',
-        'new', 'old', 'young', 'fast', 'slow', 'hard', 'soft', 'strong', 'weak',
-        'happy', 'sad', 'angry', 'calm', 'quiet', 'loud', 'bright', 'dark',
-        'rich', 'poor', 'free', 'busy', 'easy', 'hard', 'simple', 'difficult',
-        
-        # Occupations/Titles
-        'doctor', 'nurse', 'teacher', 'student', 'worker', 'manager', 'director',
-        'cook', 'baker', 'farmer', 'driver', 'pilot', 'captain', 'judge',
-        'artist', 'writer', 'singer', 'actor', 'player', 'hunter', 'fisher',
-        'mason', 'taylor', 'turner', 'walker', 'parker', 'porter', 'carter',
-        
-        # Geographic/Place terms
-        'north', 'south', 'east', 'west', 'center', 'middle', 'top', 'bottom',
-        'city', 'town', 'village', 'country', 'state', 'place', 'area', 'region',
-        'street', 'road', 'avenue', 'lane', 'way', 'path', 'bridge', 'park',
-        'church', 'temple', 'hall', 'tower', 'castle', 'palace',
-        'island', 'beach', 'shore', 'coast', 'port', 'bay', 'gulf',
-        
-        # Animals
-        'cat', 'dog', 'bird', 'fish', 'horse', 'cow', 'pig', 'sheep', 'goat',
-        'lion', 'tiger', 'bear', 'wolf', 'fox', 'deer', 'rabbit', 'mouse',
-        'bee', 'ant', 'fly', 'spider', 'snake', 'frog', 'duck', 'swan',
-        
-        # Body parts
-        'head', 'face', 'eye', 'ear', 'nose', 'mouth', 'hand', 'foot', 'arm', 'leg',
-        'heart', 'brain', 'bone', 'skin', 'hair', 'nail',
-        
-        # Common words that are often names
-        'angel', 'joy', 'grace', 'faith', 'hope', 'charity', 'patience', 'mercy',
-        'peace', 'love', 'dream', 'wish', 'star', 'moon', 'sun', 'sky',
-        'rain', 'snow', 'wind', 'storm', 'thunder', 'lightning',
-        
-        # Misc common words
-        'name', 'names', 'word', 'letter', 'number', 'page', 'line', 'text',
-        'picture', 'image', 'photo', 'video', 'music', 'song', 'sound', 'voice',
-        'game', 'sport', 'team', 'player', 'winner', 'loser', 'score', 'point',
-        'question', 'answer', 'problem', 'solution', 'idea', 'plan', 'goal',
-        'start', 'end', 'begin', 'finish', 'stop', 'pause', 'continue',
-        'yes', 'no', 'maybe', 'never', 'always', 'sometimes', 'often', 'rarely',
-        
-        # Single letters that might be names
-        'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm',
-        'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z',
-        
-        # Common conversation words
-        'the', 'okay', 'yeah', 'well', 'but', 'move', 'thank', 'thanks', 'please',
-        'sorry', 'excuse', 'hello', 'hi', 'bye', 'goodbye', 'welcome', 'congrats',
-        'um', 'uh', 'oh', 'ah', 'hmm', 'wow', 'great', 'nice', 'fine', 'sure',
-        'actually', 'really', 'basically', 'obviously', 'definitely', 'probably',
-        'maybe', 'perhaps', 'anyway', 'however', 'therefore', 'because', 'since',
-        'although', 'though', 'unless', 'until', 'while', 'during', 'before', 'after',
-        
-        # Additional problematic words
-        'whale', 'whales', 'look', 'let', 'lets', 'every', 'put', 'nor', 'did', 'wave',
-        'wait', 'mummy', 'baby', 'lots', 'lovely', 'say', 'painting', 'shower', 'nowhere',
-        'pardon', 'breakfast', 'bible', 'wayo', 'shovel', 'shadows', 'meow', 'noy',
-        
-        # Question words and pronouns
-        'what', 'who', 'when', 'where', 'why', 'how', 'which', 'whose',
-        'he', 'she', 'it', 'they', 'we', 'you', 'i', 'me', 'him', 'her', 'them', 'us',
-        'this', 'that', 'these', 'those', 'here', 'there', 'now', 'then',
-        'some', 'any', 'all', 'each', 'every', 'many', 'much', 'few', 'little',
-        
-        # Prepositions and conjunctions 
-        'in', 'on', 'at', 'by', 'for', 'with', 'without', 'to', 'from', 'of',
-        'about', 'above', 'below', 'under', 'over', 'through', 'between', 'among',
-        'and', 'or', 'but', 'so', 'if', 'as', 'than', 'like', 'unlike',
-        
-        # Common verbs that might appear as names
-        'do', 'does', 'did', 'be', 'am', 'is', 'are', 'was', 'were', 'been', 'being',
-        'have', 'has', 'had', 'having', 'get', 'got', 'getting', 'put', 'putting',
-        'say', 'said', 'saying', 'tell', 'told', 'telling', 'ask', 'asked', 'asking',
-        'know', 'knew', 'known', 'knowing', 'think', 'thought', 'thinking',
-        'look', 'looked', 'looking', 'seem', 'seemed', 'seeming', 'try', 'tried', 'trying',
-        
-        # Common contractions (without apostrophes since they're stripped in processing)
-        'hes', 'shes', 'its', 'thats', 'whats', 'wheres', 'theres', 'youre', 'theyre',
-        'were', 'werent', 'cant', 'dont', 'wont', 'isnt', 'arent', 'wasnt', 'havent', 'hasnt', 'hadnt',
-        'ill', 'youll', 'hell', 'shell', 'well', 'theyll', 'ive', 'youve', 'weve', 'theyve',
-        'id', 'youd', 'hed', 'shed', 'wed', 'theyd', 'lets', 'theres', 'heres',
-        
-        # Numbers and quantities
-        'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
-        'first', 'second', 'third', 'fourth', 'fifth', 'last', 'next', 'another',
-        'more', 'most', 'less', 'least', 'enough', 'too', 'very', 'quite', 'rather',
-        
-        # Technology and modern words
-        'app', 'web', 'site', 'email', 'text', 'call', 'chat', 'post', 'like', 'share',
-        'click', 'tap', 'swipe', 'scroll', 'zoom', 'search', 'find', 'save', 'delete',
-        'update', 'download', 'upload', 'install', 'connect', 'wifi', 'internet',
-        
-        # Business and finance
-        'buy', 'sell', 'pay', 'cost', 'price', 'cheap', 'expensive', 'free', 'sale',
-        'deal', 'offer', 'discount', 'tax', 'fee', 'bill', 'check', 'cash', 'card',
-        'bank', 'account', 'loan', 'debt', 'invest', 'profit', 'loss', 'budget'
-    }
-    
-    # Remove problematic names
-    filtered = names - common_words
-    
-    # Also remove very short names (1-2 characters) as they're likely to be false positives
-    filtered = {name for name in filtered if len(name) >= 3}
-    
-    return filtered
+    # Remove problematic names, and very short names (1-2 characters) as
+    # they're likely to be false positives, in a single pass
+    return {name for name in names if len(name) >= 3 and name not in COMMON_WORDS}
 
 def create_multilingual_curated_names(selected_languages=None, exclude_common_words=True):
     """Create comprehensive multilingual curated names database from CSV file.
@@ -488,18 +567,26 @@ def create_multilingual_curated_names(selected_languages=None, exclude_common_wo
     all_first_names = set()
     all_surnames = set()
     
+    selected_language_set = set(selected_languages)
+    
     try:
         with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+            # Plain rows indexed by header position (no per-row dict)
+            reader = csv.reader(f)
+            header = next(reader)
+            name_col, type_col, language_col = header.index('name'), header.index('type'), header.index('language')
             for row in reader:
-                name = row['name'].strip().lower()
-                name_type = row['type'].strip().lower()
-                language = row['language'].strip().lower()
+                if not row:
+                    continue
+                language = row[language_col].strip().lower()
                 
                 # Only include names from selected languages
-                if language not in selected_languages:
+                if language not in selected_language_set:
                     continue
                 
+                name = row[name_col].strip().lower()
+                name_type = row[type_col].strip().lower()
+                
                 # Add to appropriate set
                 if name_type == 'first':
                     all_first_names.add(name)
@@ -545,6 +632,11 @@ def create_basic_english_names():
     print("   [LEGACY] create_basic_english_names() called - redirecting to multilingual database")
     return create_multilingual_curated_names(['english'], exclude_common_words=True)  # Always filter for English
 
+# Characters stripped from a word before looking it up in the name database
+NON_WORD_PATTERN = re.compile(r'[^\w]')
+# Sentence boundaries for name masking (sentences give the log its context)
+MASKING_SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
 def create_enhanced_name_masker(use_facebook_names=False, use_facebook_surnames=False, selected_languages=None, exclude_common_words=True, excluded_names=None):
     """Create enhanced name masking with global database and logging.
     
@@ -571,11 +663,11 @@ def create_enhanced_name_masker(use_facebook_names=False, use_facebook_surnames=
         first_names = names_data
         surnames = set()
     
-    # Apply excluded names (case-insensitive)
+    # Apply excluded names (case-insensitive; the name sets are already lowercase)
     if excluded_names:
         excluded_names_lower = {name.lower() for name in excluded_names}
-        first_names = {name for name in first_names if name.lower() not in excluded_names_lower}
-        surnames = {name for name in surnames if name.lower() not in excluded_names_lower}
+        first_names = first_names - excluded_names_lower
+        surnames = surnames - excluded_names_lower
         print(f"   ℹ️  Excluding {len(excluded_names)} name(s) from masking")
     
     # Title prefixes
@@ -589,95 +681,80 @@ def create_enhanced_name_masker(use_facebook_names=False, use_facebook_surnames=
         nonlocal replacement_log
         replacement_log = []  # Reset for new file
         
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        masked_sentences = []
+        sentences = MASKING_SENTENCE_SPLIT_PATTERN.split(text)
+        # Words of every sentence go into one buffer that is joined once at the end
+        masked_words = []
         replacement_counter = 1
         
-        for sentence_idx, sentence in enumerate(sentences):
+        for sentence in sentences:
             if not sentence.strip():
-                masked_sentences.append(sentence)
+                masked_words.append(sentence)
                 continue
                 
             words = sentence.split()
-            masked_words = []
             
-            for word_idx, word in enumerate(words):
-                original_word = word
-                clean_word = re.sub(r'[^\w]', '', word.lower())
+            # Names are only masked when capitalized, and titles only when the
+            # next word is a capitalized name, so only capitalized words and
+            # the words just before them need database lookups
+            capitalized = [word[0].isupper() for word in words]
+            candidates = [
+                word_idx for word_idx in range(len(words))
+                if capitalized[word_idx] or (word_idx + 1 < len(words) and capitalized[word_idx + 1])
+            ]
+            
+            for word_idx in candidates:
+                word = words[word_idx]
+                clean_word = NON_WORD_PATTERN.sub('', word.lower())
                 
                 # Skip if empty after cleaning
                 if not clean_word:
-                    masked_words.append(word)
                     continue
                 
-                # Check if word is capitalized
-                is_capitalized = word[0].isupper() if word else False
-                
-                # Check if it's at the start of a sentence (excluding titles/pronouns)
-                is_sentence_start = word_idx == 0
-                
-                # Check if it's a name (requires capitalization, but be careful at sentence start)
-                is_first_name = clean_word in first_names
-                is_surname = clean_word in surnames
-                is_title = clean_word in titles
-                
-                # Only mask if:
-                # 1. It's capitalized AND in the database, AND
-                # 2. Either it's NOT at sentence start, OR it appears multiple times capitalized
-                should_mask = is_capitalized and (is_first_name or is_surname)
-                
-                # Special handling: if at sentence start, only mask if it's uncommon or appears mid-sentence too
-                # This prevents masking "Will you..." but allows masking repeated names
-                if should_mask and is_sentence_start:
-                    # Keep common words at sentence start (they're likely not names)
-                    # The filter already removed most common words, but double-check context
-                    should_mask = True  # Trust the filtered database
-                
                 # Check for title + name combinations
-                if is_title and word_idx + 1 < len(words):
-                    next_word = re.sub(r'[^\w]', '', words[word_idx + 1].lower())
-                    next_is_capitalized = words[word_idx + 1][0].isupper() if words[word_idx + 1] else False
-                    if next_is_capitalized and (next_word in first_names or next_word in surnames):
+                if clean_word in titles and word_idx + 1 < len(words) and capitalized[word_idx + 1]:
+                    next_word = NON_WORD_PATTERN.sub('', words[word_idx + 1].lower())
+                    if next_word in first_names or next_word in surnames:
                         # Log the title
                         replacement_log.append({
                             'order': replacement_counter,
-                            'original': original_word,
+                            'original': word,
                             'replacement': '[TITLE]',
                             'context_sentence': sentence.strip(),
                             'filename': filename
                         })
                         replacement_counter += 1
-                        masked_words.append('[TITLE]')
+                        words[word_idx] = '[TITLE]'
                         continue
                 
                 # Process names (requires capitalization + database match)
-                if should_mask:
+                if not capitalized[word_idx]:
+                    continue
+                is_surname = clean_word in surnames
+                if is_surname or clean_word in first_names:
                     # Preserve punctuation
-                    punctuation = re.findall(r'[^\w]', word)
+                    punctuation = ''.join(NON_WORD_PATTERN.findall(word))
                     
                     # Choose appropriate replacement based on name type
                     if is_surname:
-                        replacement = '[SURNAME]' + ''.join(punctuation)
+                        replacement = '[SURNAME]' + punctuation
                     else:
-                        replacement = '[NAME]' + ''.join(punctuation)
+                        replacement = '[NAME]' + punctuation
                     
                     # Log the replacement
                     replacement_log.append({
                         'order': replacement_counter,
-                        'original': original_word,
+                        'original': word,
                         'replacement': replacement,
                         'context_sentence': sentence.strip(),
                         'filename': filename
                     })
                     replacement_counter += 1
                     
-                    masked_words.append(replacement)
-                else:
-                    masked_words.append(word)
+                    words[word_idx] = replacement
             
-            masked_sentences.append(' '.join(masked_words))
+            masked_words.extend(words)
         
-        return ' '.join(masked_sentences)
+        return ' '.join(masked_words)
     
     def get_replacement_log():
         """Get the current replacement log."""
@@ -700,13 +777,12 @@ def save_replacement_log(replacement_log, filename):
     log_file = logs_dir / f"name_replacements_{base_name}.csv"
     
     # Write CSV
-    with open(log_file, 'w', newline='', encoding='utf-8') as csvfile:
+    with open(log_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
         fieldnames = ['filename', 'order', 'original', 'replacement', 'context_sentence']
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         
         writer.writeheader()
-        for entry in replacement_log:
-            writer.writerow(entry)
+        writer.writerows(replacement_log)
     
     print(f"   📝 Name replacement log saved: {log_file}")
     print(f"   📊 Total replacements: {len(replacement_log)}")
@@ -720,43 +796,47 @@ def create_core_name_masker(use_facebook_database=False):
     return mask_func
 
 
+# Emoji and pictograph code point ranges stripped from transcripts
+EMOJI_RANGES = (
+    u"\U0001F600-\U0001F64F"  # emoticons
+    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+    u"\U0001F680-\U0001F6FF"  # transport & map symbols
+    u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    u"\U00002702-\U000027B0"  # dingbats
+    u"\U000024C2-\U0001F251"  # enclosed characters
+    u"\U0001F900-\U0001F9FF"  # supplemental symbols
+    u"\U0001FA70-\U0001FAFF"  # symbols and pictographs extended-A
+    u"\U00002600-\U000026FF"  # miscellaneous symbols
+    u"\U00002700-\U000027BF"  # dingbats
+)
+# Emojis plus any other non-ASCII character that is not whitespace, removed in one scan
+UNICODE_ARTIFACTS_PATTERN = re.compile("(?:[" + EMOJI_RANGES + "]|[^\x00-\x7F\\s])+")
+ISOLATED_SYMBOLS_PATTERN = re.compile(r'\s+[^\w\s\[\].,!?;:\'"()-]+\s+')
+
 def remove_emojis_and_unicode_artifacts(text):
     """
     Remove emojis, Unicode artifacts, and non-English characters from transcription.
     Ensures clean, readable text without visual artifacts.
     """
-    import re
-    
-    # Step 1: Remove emoji patterns (comprehensive Unicode ranges)
-    # Emoticons and misc symbols
-    emoji_pattern = re.compile(
-        "["
-        u"\U0001F600-\U0001F64F"  # emoticons
-        u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-        u"\U0001F680-\U0001F6FF"  # transport & map symbols
-        u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-        u"\U00002702-\U000027B0"  # dingbats
-        u"\U000024C2-\U0001F251"  # enclosed characters
-        u"\U0001F900-\U0001F9FF"  # supplemental symbols
-        u"\U0001FA70-\U0001FAFF"  # symbols and pictographs extended-A
-        u"\U00002600-\U000026FF"  # miscellaneous symbols
-        u"\U00002700-\U000027BF"  # dingbats
-        "]+", 
-        flags=re.UNICODE
-    )
-    text = emoji_pattern.sub(r'', text)
-    
-    # Step 2: Remove other problematic Unicode characters and symbols
-    # Remove various Unicode symbols that shouldn't be in speech transcription
-    text = re.sub(r'[^\x00-\x7F\s]', '', text)  # Remove non-ASCII characters
-    
-    # Step 3: Remove isolated symbols and artifacts
-    text = re.sub(r'\s+[^\w\s\[\].,!?;:\'"()-]+\s+', ' ', text)  # Remove isolated symbols
-    
-    # Step 4: Clean up multiple spaces
-    text = re.sub(r'\s+', ' ', text)
-    
-    return text.strip()
+    # Step 1: Remove emojis and other non-ASCII characters (whitespace is
+    # kept for step 4); pure-ASCII text has nothing to remove
+    if not text.isascii():
+        text = UNICODE_ARTIFACTS_PATTERN.sub('', text)
+    
+    # Step 2: Remove isolated symbols and artifacts
+    text = ISOLATED_SYMBOLS_PATTERN.sub(' ', text)
+    
+    # Step 3: Clean up multiple spaces (split/join collapses and strips in one pass)
+    return ' '.join(text.split())
+
+# Repetition detection patterns. Their input has already been through
+# remove_emojis_and_unicode_artifacts and is plain ASCII, so they (like the
+# cleaning patterns below) use re.ASCII character classes
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+', re.ASCII)
+# A phrase (2-6 words) repeated five or more times in a row
+PHRASE_REPETITION_PATTERN = re.compile(r'(\b\w+(?:\s+\w+){1,5})\s*(?:\1\s*){4,}', re.IGNORECASE | re.ASCII)
+COUNTING_PATTERN = re.compile(r'(?:one\s+two\s+three\s+four\s+five\s+six\s+seven\s+eight\s+nine\s*){3,}', re.IGNORECASE | re.ASCII)
+SYMBOL_REPETITION_PATTERN = re.compile(r'([^\w\s])\s*\1{5,}', re.ASCII)
 
 def detect_and_fix_repetitions(text, max_repetitions=5):
     """
@@ -764,16 +844,14 @@ def detect_and_fix_repetitions(text, max_repetitions=5):
     Handles massive repetitive patterns that are clearly AI artifacts.
     This addresses patterns like 'I have this. I have this.' repeated 80+ times.
     """
-    import re
-
     # Step 1: Detect and fix sentence-level repetitions (AI artifacts)
     # Pattern: Same sentence repeated many times
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = [sentence.strip() for sentence in SENTENCE_SPLIT_PATTERN.split(text)]
     cleaned_sentences = []
     
     i = 0
     while i < len(sentences):
-        current_sentence = sentences[i].strip()
+        current_sentence = sentences[i]
         if not current_sentence:
             i += 1
             continue
@@ -781,7 +859,7 @@ def detect_and_fix_repetitions(text, max_repetitions=5):
         # Count consecutive identical sentences
         repetition_count = 1
         j = i + 1
-        while j < len(sentences) and sentences[j].strip() == current_sentence:
+        while j < len(sentences) and sentences[j] == current_sentence:
             repetition_count += 1
             j += 1
         
@@ -794,8 +872,7 @@ def detect_and_fix_repetitions(text, max_repetitions=5):
             i = j
         else:
             # Keep all instances of normal repetitions
-            for k in range(repetition_count):
-                cleaned_sentences.append(current_sentence)
+            cleaned_sentences.extend([current_sentence] * repetition_count)
             i = j
     
     text = ' '.join(cleaned_sentences)
@@ -817,26 +894,24 @@ def detect_and_fix_repetitions(text, max_repetitions=5):
     
     # Look for patterns like "phrase phrase phrase phrase"
     # This regex finds a phrase (2-6 words) repeated multiple times
-    phrase_pattern = r'(\b\w+(?:\s+\w+){1,5})\s*(?:\1\s*){4,}'
-    text = re.sub(phrase_pattern, fix_phrase_repetitions, text, flags=re.IGNORECASE)
+    text = PHRASE_REPETITION_PATTERN.sub(fix_phrase_repetitions, text)
     
     # Step 3: Remove excessive counting sequences that are causing the bug
-    counting_pattern = r'(?:one\s+two\s+three\s+four\s+five\s+six\s+seven\s+eight\s+nine\s*){3,}'
-    text = re.sub(counting_pattern, '[...]', text, flags=re.IGNORECASE)
+    text = COUNTING_PATTERN.sub('[...]', text)
 
     # Step 4: Remove excessive emoji repetitions
-    text = re.sub(r'([^\w\s])\s*\1{5,}', r'\1\1\1', text)
+    text = SYMBOL_REPETITION_PATTERN.sub(r'\1\1\1', text)
 
     # Step 5: Clean up simple word repetitions more conservatively
     words = text.split()
+    lowered_words = text.lower().split()
     cleaned_words = []
     i = 0
     while i < len(words):
-        word = words[i]
         count = 1
 
         # Count consecutive identical words
-        while i + count < len(words) and words[i + count].lower() == word.lower():
+        while i + count < len(words) and lowered_words[i + count] == lowered_words[i]:
             count += 1
 
         # Keep only reasonable number of repetitions
@@ -850,6 +925,128 @@ def detect_and_fix_repetitions(text, max_repetitions=5):
     result = ' '.join(cleaned_words)
     return result if result else text
 
+# Word-level contractions and misspellings (matched case-insensitively as whole words)
+CONTRACTIONS = {
+    # Basic contractions
+    'im': "I'm",
+    'youre': "you're",
+    'theyre': "they're",
+    'were': "we're",
+    'itsits': "it's",
+    'its': "it's",  # context-dependent, be careful
+    'dont': "don't",
+    'wont': "won't",
+    'cant': "can't",
+    'isnt': "isn't",
+    'arent': "aren't",
+    'wasnt': "wasn't",
+    'werent': "weren't",
+    'hasnt': "hasn't",
+    'havent': "haven't",
+    'hadnt': "hadn't",
+    'couldnt': "couldn't",
+    'shouldnt': "shouldn't",
+    'wouldnt': "wouldn't",
+    'didnt': "didn't",
+    'doesnt': "doesn't",
+
+    # Will contractions
+    'theyll': "they'll",
+    'youll': "you'll",
+    'itll': "it'll",
+    'thatll': "that'll",
+    'wholl': "who'll",
+    'whatll': "what'll",
+
+    # Have contractions
+    'ive': "I've",
+    'youve': "you've",
+    'weve': "we've",
+    'theyve': "they've",
+    'couldve': "could've",
+    'shouldve': "should've",
+    'wouldve': "would've",
+
+    # Would contractions
+    'id': "I'd",
+    'youd': "you'd",
+    'hed': "he'd",
+    'shed': "she'd",
+    'wed': "we'd",
+    'theyd': "they'd",
+}
+
+# Space-separated contractions (Whisper model artifacts), e.g. "isn t"
+SPLIT_CONTRACTIONS = {
+    'isn': "isn't",
+    'doesn': "doesn't",
+    'don': "don't",
+    'won': "won't",
+    'can': "can't",
+    'aren': "aren't",
+    'wasn': "wasn't",
+    'weren': "weren't",
+    'hasn': "hasn't",
+    'haven': "haven't",
+    'hadn': "hadn't",
+    'couldn': "couldn't",
+    'shouldn': "shouldn't",
+    'wouldn': "wouldn't",
+    'didn': "didn't",
+}
+
+# Common misheard words and phrases, normalised to these spellings
+COMMON_FIXES = {
+    'and all of': 'and all of',  # overlaps 'and all' + 'all of'
+    'and all': 'and all',
+    'kind of': 'kind of',
+    'sort of': 'sort of',
+    'you know': 'you know',
+    'i mean': 'I mean',
+    'i think': 'I think',
+    'i guess': 'I guess',
+    'i feel like': 'I feel like',
+    'going to': 'going to',
+    'want to': 'want to',
+    'have to': 'have to',
+    'trying to': 'trying to',
+    'used to': 'used to',
+    'supposed to': 'supposed to',
+    'a lot of': 'a lot of',
+    'a little bit': 'a little bit',
+    'all of': 'all of',
+    'some of': 'some of',
+    'one of': 'one of',
+    'none of': 'none of',
+}
+
+def _word_alternation(words):
+    """Regex alternation of literal words/phrases, longest first."""
+    return '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+def _compile_word_table_pattern(pattern):
+    """Compile a case-insensitive word-table pattern with RE2 if installed, else with re."""
+    if RE2_AVAILABLE:
+        try:
+            return re2.compile('(?i)' + pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern, re.IGNORECASE | re.ASCII)
+
+# Each table is applied in a single scan of the text instead of one re.sub per entry
+UNDEFINED_PATTERN = re.compile(r'\s+(?:undefined|undefine|undefin|undefining)(?=\s)', re.IGNORECASE | re.ASCII)
+FILLER_PATTERN = _compile_word_table_pattern(r'\b(um|uh|er|ah|hmm|mm|mhm|uhuh|uhhuh)\b')
+CONTRACTIONS_PATTERN = _compile_word_table_pattern(
+    r'\b(?:(' + _word_alternation(CONTRACTIONS) + r')|(' + _word_alternation(SPLIT_CONTRACTIONS) + r')\s+t)\b'
+)
+COMMON_FIXES_PATTERN = _compile_word_table_pattern(r'\b(?:' + _word_alternation(COMMON_FIXES) + r')\b')
+SENTENCE_START_PATTERN = re.compile(r'(^|[.!?])(\s*)([a-z])', re.ASCII)
+
+def _fix_contraction(match):
+    if match.group(1):
+        return CONTRACTIONS[match.group(1).lower()]
+    return SPLIT_CONTRACTIONS[match.group(2).lower()]
+
 def clean_transcription_text(text):
     """
     Comprehensive text cleaning for transcription output.
@@ -857,150 +1054,47 @@ def clean_transcription_text(text):
     """
     
     # 1. Handle undefined terms and speech artifacts
-    text = re.sub(r'\s+undefined\s+', ' [undefined] ', text, flags=re.IGNORECASE)
-    text = re.sub(r'\s+undefine\s+', ' [undefined] ', text, flags=re.IGNORECASE)
-    text = re.sub(r'\s+undefin\s+', ' [undefined] ', text, flags=re.IGNORECASE)
-    text = re.sub(r'\s+undefining\s+', ' [undefined] ', text, flags=re.IGNORECASE)
+    text = UNDEFINED_PATTERN.sub(' [undefined]', text)
     
     # 2. Handle filler words and hesitations (mark but don't remove)
-    text = re.sub(r'\b(um|uh|er|ah|hmm|mm|mhm|uhuh|uhhuh)\b', r'[\1]', text, flags=re.IGNORECASE)
-    
-    # 3. Fix common transcription errors and contractions
-    contractions = {
-        # Basic contractions
-        r'\bim\b': "I'm",
-        r'\byoure\b': "you're", 
-        r'\btheyre\b': "they're",
-        r'\bwere\b': "we're",
-        r'\bitsits\b': "it's",
-        r'\bits\b': "it's",  # context-dependent, be careful
-        r'\bdont\b': "don't",
-        r'\bwont\b': "won't",
-        r'\bcant\b': "can't",
-        r'\bisnt\b': "isn't",
-        r'\barent\b': "aren't",
-        r'\bwasnt\b': "wasn't",
-        r'\bwerent\b': "weren't",
-        r'\bhasnt\b': "hasn't",
-        r'\bhavent\b': "haven't",
-        r'\bhadnt\b': "hadn't",
-        r'\bcouldnt\b': "couldn't",
-        r'\bshouldnt\b': "shouldn't",
-        r'\bwouldnt\b': "wouldn't",
-        r'\bdidnt\b': "didn't",
-        r'\bdoesnt\b': "doesn't",
-
-        # Space-separated contractions (Whisper model artifacts)
-        r'\bisn\s+t\b': "isn't",
-        r'\bdoesn\s+t\b': "doesn't",
-        r'\bdon\s+t\b': "don't",
-        r'\bwon\s+t\b': "won't",
-        r'\bcan\s+t\b': "can't",
-        r'\baren\s+t\b': "aren't",
-        r'\bwasn\s+t\b': "wasn't",
-        r'\bweren\s+t\b': "weren't",
-        r'\bhasn\s+t\b': "hasn't",
-        r'\bhaven\s+t\b': "haven't",
-        r'\bhadn\s+t\b': "hadn't",
-        r'\bcouldn\s+t\b': "couldn't",
-        r'\bshouldn\s+t\b': "shouldn't",
-        r'\bwouldn\s+t\b': "wouldn't",
-        r'\bdidn\s+t\b': "didn't",
-        
-        # Will contractions  
-        r'\btheyll\b': "they'll",
-        r'\byoull\b': "you'll",
-        r'\bitll\b': "it'll",
-        r'\bthatll\b': "that'll",
-        r'\bwholl\b': "who'll",
-        r'\bwhatll\b': "what'll",
-        
-        # Have contractions
-        r'\bive\b': "I've",
-        r'\byouve\b': "you've",
-        r'\bweve\b': "we've",
-        r'\btheyve\b': "they've",
-        r'\bcouldve\b': "could've",
-        r'\bshouldve\b': "should've",
-        r'\bwouldve\b': "would've",
-        
-        # Would contractions
-        r'\bid\b': "I'd",
-        r'\byoud\b': "you'd", 
-        r'\bhed\b': "he'd",
-        r'\bshed\b': "she'd",
-        r'\bwed\b': "we'd",
-        r'\btheyd\b': "they'd",
-    }
-    
-    # Apply contraction fixes (case-insensitive)
-    for pattern, replacement in contractions.items():
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    text = FILLER_PATTERN.sub(r'[\1]', text)
+    
+    # 3. Fix common transcription errors and contractions (case-insensitive)
+    text = CONTRACTIONS_PATTERN.sub(_fix_contraction, text)
     
     # 4. Fix common misheard words and phrases
-    common_fixes = {
-        r'\band all\b': 'and all',
-        r'\bkind of\b': 'kind of',
-        r'\bsort of\b': 'sort of', 
-        r'\byou know\b': 'you know',
-        r'\bi mean\b': 'I mean',
-        r'\bi think\b': 'I think',
-        r'\bi guess\b': 'I guess',
-        r'\bi feel like\b': 'I feel like',
-        r'\bgoing to\b': 'going to',
-        r'\bwant to\b': 'want to',
-        r'\bhave to\b': 'have to',
-        r'\btrying to\b': 'trying to',
-        r'\bused to\b': 'used to',
-        r'\bsupposed to\b': 'supposed to',
-        r'\ba lot of\b': 'a lot of',
-        r'\ba little bit\b': 'a little bit',
-        r'\ball of\b': 'all of',
-        r'\bsome of\b': 'some of',
-        r'\bone of\b': 'one of',
-        r'\bnone of\b': 'none of',
-    }
-    
-    for pattern, replacement in common_fixes.items():
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    text = COMMON_FIXES_PATTERN.sub(lambda m: COMMON_FIXES[m.group(0).lower()], text)
     
     # 5. Fix spacing and punctuation issues
-    text = re.sub(r'\s+', ' ', text)  # Multiple spaces to single
-    text = re.sub(r'\s+([,.])', r'\1', text)  # Space before punctuation
+    text = re.sub(r'\s+', ' ', text, flags=re.ASCII)  # Multiple spaces to single
+    text = re.sub(r'\s+([,.])', r'\1', text, flags=re.ASCII)  # Space before punctuation
     text = re.sub(r'([,.])([a-zA-Z])', r'\1 \2', text)  # Missing space after punctuation
     
     # 6. Capitalize sentence beginnings and "I"
-    # Split into sentences and capitalize first word
-    sentences = re.split(r'([.!?])', text)
-    for i in range(0, len(sentences), 2):  # Every other element is sentence content
-        if sentences[i].strip():
-            # Capitalize first word
-            sentences[i] = re.sub(r'^\s*([a-z])', lambda m: m.group(1).upper(), sentences[i])
-            # Capitalize standalone "i"
-            sentences[i] = re.sub(r'\bi\b', 'I', sentences[i])
-    
-    text = ''.join(sentences)
+    text = SENTENCE_START_PATTERN.sub(lambda m: m.group(1) + m.group(2) + m.group(3).upper(), text)
+    text = re.sub(r'\bi\b', 'I', text, flags=re.ASCII)
+    
     # 8. Fix punctuation spacing issues
     # Fix spaces before punctuation (keep space after)
-    text = re.sub(r'\s+([.,!?;:])', r'\1', text)
+    text = re.sub(r'\s+([.,!?;:])', r'\1', text, flags=re.ASCII)
     
     # Ensure space after punctuation marks (but not if followed by another punctuation)
-    text = re.sub(r'([.,!?;:])([^\s.,!?;:])', r'\1 \2', text)
+    text = re.sub(r'([.,!?;:])([^\s.,!?;:])', r'\1 \2', text, flags=re.ASCII)
     
     # Fix multiple punctuation issues
-    text = re.sub(r'([.,!?])\s*\1+', r'\1', text)  # Remove duplicate punctuation
-    text = re.sub(r'([.,!?;:])\s+([.,!?;:])', r'\1\2', text)  # Fix space between punctuation
+    text = re.sub(r'([.,!?])\s*\1+', r'\1', text, flags=re.ASCII)  # Remove duplicate punctuation
+    text = re.sub(r'([.,!?;:])\s+([.,!?;:])', r'\1\2', text, flags=re.ASCII)  # Fix space between punctuation
     
     # Fix quotation mark spacing
-    text = re.sub(r'\s+"', '"', text)  # Remove space before opening quote
-    text = re.sub(r'"\s+', '" ', text)  # Ensure space after closing quote
-    text = re.sub(r'"\s*([.,!?;:])', r'"\1', text)  # No space between quote and punctuation
+    text = re.sub(r'\s+"', '"', text, flags=re.ASCII)  # Remove space before opening quote
+    text = re.sub(r'"\s+', '" ', text, flags=re.ASCII)  # Ensure space after closing quote
+    text = re.sub(r'"\s*([.,!?;:])', r'"\1', text, flags=re.ASCII)  # No space between quote and punctuation
     
     # Fix parentheses spacing  
-    text = re.sub(r'\s*\(\s*', ' (', text)  # Space before opening paren
-    text = re.sub(r'\s*\)\s*', ') ', text)  # Space after closing paren
-    text = re.sub(r'\(\s+', '(', text)  # No space after opening paren
-    text = re.sub(r'\s+\)', ')', text)  # No space before closing paren
+    text = re.sub(r'\s*\(\s*', ' (', text, flags=re.ASCII)  # Space before opening paren
+    text = re.sub(r'\s*\)\s*', ') ', text, flags=re.ASCII)  # Space after closing paren
+    text = re.sub(r'\(\s+', '(', text, flags=re.ASCII)  # No space after opening paren
+    text = re.sub(r'\s+\)', ')', text, flags=re.ASCII)  # No space before closing paren
 
     
     # 7. Clean up extra whitespace and return
@@ -1093,50 +1187,186 @@ def create_word_document(text_content, output_path, input_file, mask_names=False
     except Exception as e:
         print(f"Error creating Word document: {e}")
         return False
+@lru_cache(maxsize=None)
+def cuda_available():
+    """Check once per run whether a CUDA GPU can be used."""
+    return AUDIO_LIBS_AVAILABLE and torch.cuda.is_available()
+
+def load_audio(audio_path, sr=16000):
+    """Load audio as mono float32 at the given sample rate.
+    
+    WAV/FLAC files are read directly with soundfile (resampling only when the
+    file's rate differs); other formats go through librosa's decoders.
+    """
+    if Path(audio_path).suffix.lower() in ('.wav', '.flac'):
+        try:
+            audio, file_sr = sf.read(audio_path, dtype='float32', always_2d=False)
+        except RuntimeError:
+            pass  # Unreadable by libsndfile - let librosa try
+        else:
+            if audio.ndim == 2:
+                audio = audio.mean(axis=1, dtype=np.float32)
+            if file_sr != sr:
+                audio = librosa.resample(audio, orig_sr=file_sr, target_sr=sr)
+            return audio, sr
+    return librosa.load(audio_path, sr=sr, dtype=np.float32)
+
+def spectral_subtraction_gpu(audio, sr, alpha=2.0):
+    """Spectral subtraction on the GPU with torch; same STFT settings as librosa's defaults."""
+    device = torch.device("cuda")
+    n_fft, hop_length = 2048, 512
+
+    # No autograd bookkeeping is needed for any of these tensors
+    with torch.inference_mode():
+        window = torch.hann_window(n_fft, device=device)
+        x = torch.from_numpy(audio).to(device)
+
+        stft = torch.stft(x, n_fft=n_fft, hop_length=hop_length, window=window,
+                          center=True, pad_mode="constant", return_complex=True)
+        magnitude = stft.abs()
+
+        # Estimate noise from first 0.5 seconds
+        noise_frames = int(0.5 * sr / hop_length)
+        noise_magnitude = magnitude[:, :noise_frames].mean(dim=1, keepdim=True)
+
+        # max(|X| - alpha*N, 0.1*|X|) applied as a real gain on X, which keeps
+        # the phase without computing angle/exp; the gain is built in place
+        # in the magnitude buffer
+        gain = magnitude.clamp_min_(torch.finfo(magnitude.dtype).tiny).reciprocal_()
+        gain.mul_(alpha * noise_magnitude).neg_().add_(1.0).clamp_min_(0.1)
+        stft.mul_(gain)
+        audio = torch.istft(stft, n_fft=n_fft, hop_length=hop_length, window=window, center=True)
+        return audio.cpu().numpy()
+
+def spectral_subtraction_cpu(audio, sr, alpha=2.0, block_seconds=30):
+    """Spectral subtraction on the CPU, processed in overlapping blocks.
+    
+    Each block is transformed with a margin of one FFT length on either
+    side, so every kept output sample sees exactly the frames it would in a
+    whole-signal STFT; peak memory is bounded by the block size rather than
+    the recording length.
+    """
+    n_fft, hop_length = 2048, 512
+    if PYFFTW_AVAILABLE:
+        # Aligned buffers let FFTW use its SIMD kernels
+        audio = pyfftw.byte_align(audio)
+
+    # Estimate noise from first 0.5 seconds (only the samples those frames span)
+    noise_frames = int(0.5 * sr / hop_length)
+    head = audio[:max(noise_frames - 1, 0) * hop_length + n_fft // 2]
+    head_magnitude = np.abs(librosa.stft(head, n_fft=n_fft, hop_length=hop_length, dtype=np.complex64))
+    noise_magnitude = np.mean(head_magnitude[:, :noise_frames], axis=1, keepdims=True)
+    noise_floor = alpha * noise_magnitude
+
+    # Same output length as a single librosa.istft of the whole signal
+    output_length = (len(audio) // hop_length) * hop_length
+    block_length = max(int(block_seconds * sr) // hop_length, 1) * hop_length
+    margin = n_fft
+    output = np.empty(output_length, dtype=np.float32)
+    gain_buffer = None  # Reused across blocks by the NumPy path
+
+    # Multithreaded FFTs when the backend is scipy.fft (pyFFTW uses NUM_THREADS)
+    with scipy.fft.set_workers(FFT_WORKERS):
+        for start in range(0, output_length, block_length):
+            end = min(start + block_length, output_length)
+            segment_start = max(start - margin, 0)
+            segment = audio[segment_start:min(end + margin, len(audio))]
+
+            stft = librosa.stft(segment, n_fft=n_fft, hop_length=hop_length, dtype=np.complex64)
+
+            # Spectral subtraction: max(|X| - alpha*N, 0.1*|X|) is applied as the
+            # real gain max(1 - alpha*N/|X|, 0.1) on X itself, so the phase is
+            # kept without computing angle/exp (silent bins stay zero)
+            if NUMBA_AVAILABLE:
+                _apply_spectral_gain(stft, noise_floor[:, 0], np.float32(0.1))
+            else:
+                if gain_buffer is None:
+                    # Sized for the longest segment (a middle block with a
+                    # margin on both sides), not for this first one
+                    max_frames = 1 + min(block_length + 2 * margin, len(audio)) // hop_length
+                    gain_buffer = np.empty((stft.shape[0], max_frames), dtype=np.float32)
+                gain = gain_buffer[:, :stft.shape[1]]
+                np.abs(stft, out=gain)
+                np.divide(noise_floor, gain, out=gain, where=gain > 0)
+                np.subtract(1.0, gain, out=gain)
+                np.maximum(gain, 0.1, out=gain)
+                stft *= gain
+            clean = librosa.istft(stft, hop_length=hop_length, n_fft=n_fft, length=len(segment))
+            output[start:end] = clean[start - segment_start:end - segment_start]
+
+    return output
+
 def enhance_audio(input_path, output_path):
-    """Enhance audio quality for better transcription."""
+    """Enhance audio quality for better transcription.
+    
+    Returns the enhanced 16 kHz samples as read back from the written file,
+    so callers get the same quantized audio without loading it again.
+    """
     print(f" Enhancing audio quality...")
 
-    # Load audio
-    audio, sr = librosa.load(input_path, sr=16000)
+    # Load audio (float32 throughout: half the memory traffic of float64,
+    # and what Whisper consumes anyway)
+    audio, sr = load_audio(input_path, sr=16000)
 
     # Apply interview_clarity preset enhancements
-    # 1. Amplification (3.61x gain)
-    audio = audio * 3.61
+    # 1. Amplification (3.61x gain), in place on the freshly loaded buffer
+    audio *= 3.61
 
     # 2. Noise reduction using spectral subtraction
-    stft = librosa.stft(audio)
-    magnitude = np.abs(stft)
-    phase = np.angle(stft)
-
-    # Estimate noise from first 0.5 seconds
-    noise_frames = int(0.5 * sr / 512)
-    noise_magnitude = np.mean(magnitude[:, :noise_frames], axis=1, keepdims=True)
-
-    # Spectral subtraction
-    alpha = 2.0
-    clean_magnitude = magnitude - alpha * noise_magnitude
-    clean_magnitude = np.maximum(clean_magnitude, 0.1 * magnitude)
+    # The noise estimate comes from the first 0.5 seconds; if that stretch is
+    # more than 40 dB below the overall level the recording is already clean
+    # and subtraction would only smear transients, so skip the STFT entirely
+    noise_head = audio[:int(0.5 * sr)]
+    overall_rms = np.sqrt(np.dot(audio, audio) / max(len(audio), 1))
+    noise_rms = np.sqrt(np.dot(noise_head, noise_head) / max(len(noise_head), 1))
+    if noise_rms < 0.01 * overall_rms:
+        print(f"   Skipping noise reduction: clean input")
+    else:
+        alpha = 2.0
+        denoised = None
+        if cuda_available():
+            try:
+                denoised = spectral_subtraction_gpu(audio, sr, alpha)
+            except RuntimeError as e:
+                print(f"   ⚠️  GPU noise reduction failed ({e}), using CPU")
+                torch.cuda.empty_cache()
 
-    # Reconstruct audio
-    clean_stft = clean_magnitude * np.exp(1j * phase)
-    audio = librosa.istft(clean_stft)
+        if denoised is None:
+            denoised = spectral_subtraction_cpu(audio, sr, alpha)
+        audio = denoised
 
-    # 4. Dynamic range compression
+    # 4. Dynamic range compression and 5. normalization to prevent clipping
     threshold = 0.1
     ratio = 4.0
-    audio_abs = np.abs(audio)
-    mask = audio_abs > threshold
-    audio[mask] = np.sign(audio[mask]) * (threshold + (audio_abs[mask] - threshold) / ratio)
-
-    # 5. Normalization to prevent clipping
-    max_val = np.max(np.abs(audio))
-    if max_val > 0.95:
-        audio = audio * (0.95 / max_val)
-
-    # Save enhanced audio
+    if NUMBA_AVAILABLE:
+        # One pass for the peak, one fused pass for compression and scaling
+        _compress_in_place(audio, threshold, ratio, 0.95)
+    else:
+        # Applied together on the magnitudes: above the threshold the
+        # compressed level threshold + (|x| - threshold) / ratio is the
+        # smaller of the two, so no boolean mask/gather is needed
+        audio_abs = np.abs(audio)
+
+        # Compression is monotonic, so the new peak follows from the old one
+        # without another pass over the signal
+        max_val = audio_abs.max() if audio_abs.size else 0.0
+        if max_val > threshold:
+            max_val = threshold + (max_val - threshold) / ratio
+
+        compressed = audio_abs - threshold
+        compressed /= ratio
+        compressed += threshold
+        np.minimum(audio_abs, compressed, out=audio_abs)
+        if max_val > 0.95:
+            audio_abs *= 0.95 / max_val
+        audio = np.copysign(audio_abs, audio)
+
+    # Save enhanced audio, then return the samples as stored (16-bit PCM),
+    # so transcription and diarization both get exactly what was written
     sf.write(output_path, audio, sr)
     print(f"   Enhanced audio saved to {output_path}")
+    audio, _ = sf.read(output_path, dtype='float32')
+    return audio
 
 def perform_speaker_diarization(audio_path):
     """
@@ -1174,7 +1404,7 @@ def perform_speaker_diarization(audio_path):
         
         # Load diarization pipeline
         print(f"   Loading pyannote/speaker-diarization-3.1 model...")
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        device = torch.device("cuda" if cuda_available() else "cpu")
         
         # Try new API first (token), fallback to old API (use_auth_token)
         try:
@@ -1220,9 +1450,11 @@ def perform_speaker_diarization(audio_path):
         print(f"   Continuing without speaker attribution...")
         return None
 
+@lru_cache(maxsize=None)
 def get_latest_version():
     """
     Read the latest version from versions.csv based on date.
+    The file is read once per run; later calls reuse the result.
     
     Returns:
         str: Version string (e.g., "1.0.0") or "Unknown" if file not found
@@ -1269,49 +1501,52 @@ def save_transcript_file(output_file, formatted_text, base_name, input_file,
         enhance_audio_enabled: Whether audio enhancement was enabled
         speaker_attribution: Whether this file has speaker labels
     """
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # Add title with filename
-        display_filename = Path(original_filename).stem if original_filename else base_name
-        # Replace underscores with colons in the title
-        title = display_filename.replace('_', ':')
-        f.write(f"{title}\n")
-        f.write(f"{'='*len(title)}\n\n")
-        
-        # Show original filename with extension
-        if original_filename:
-            input_filename = Path(original_filename).name
+    # Add title with filename
+    display_filename = Path(original_filename).stem if original_filename else base_name
+    # Replace underscores with colons in the title
+    title = display_filename.replace('_', ':')
+    header = [f"{title}\n", f"{'='*len(title)}\n\n"]
+    
+    # Show original filename with extension
+    if original_filename:
+        input_filename = Path(original_filename).name
+    else:
+        input_filename = Path(input_file).name
+    header.append(f"Input file: {input_filename}\n")
+    header.append(f"Processed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    
+    # Get and write version
+    version = get_latest_version()
+    header.append(f"Transcription system version: {version}\n")
+    
+    if model:
+        header.append(f"Model: {model}\n")
+    
+    # Individual parameter lines
+    # Order: Audio enhancement -> Language -> Repetitions -> Privacy -> Speaker attribution
+    if enhance_audio_enabled:
+        header.append(f"Audio enhanced before transcription\n")
+    if language:
+        header.append(f"Language: {language.title()}\n")
+    if fix_repetitions:
+        header.append(f"Edited to remove likely spurious repetitions.\n")
+    if mask_names:
+        if use_facebook_names or use_facebook_surnames:
+            header.append(f"Privacy: Personal names masked using Facebook list (review recommended)\n")
         else:
-            input_filename = Path(input_file).name
-        f.write(f"Input file: {input_filename}\n")
-        f.write(f"Processed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        
-        # Get and write version
-        version = get_latest_version()
-        f.write(f"Transcription system version: {version}\n")
-        
-        if model:
-            f.write(f"Model: {model}\n")
-        
-        # Individual parameter lines
-        # Order: Audio enhancement -> Language -> Repetitions -> Privacy -> Speaker attribution
-        if enhance_audio_enabled:
-            f.write(f"Audio enhanced before transcription\n")
-        if language:
-            f.write(f"Language: {language.title()}\n")
-        if fix_repetitions:
-            f.write(f"Edited to remove likely spurious repetitions.\n")
-        if mask_names:
-            if use_facebook_names or use_facebook_surnames:
-                f.write(f"Privacy: Personal names masked using Facebook list (review recommended)\n")
-            else:
-                f.write(f"Privacy: Personal names masked using internal list (review recommended)\n")
-        if speaker_attribution:
-            f.write(f"Speaker attribution: Enabled (accuracy depends on recording quality, speaker count, and speaker similarity)\n")
-        
-        f.write(f"{'='*len(display_filename)}\n\n")
-        
-        # Write transcription
-        f.write(formatted_text + "\n\n")
+            header.append(f"Privacy: Personal names masked using internal list (review recommended)\n")
+    if speaker_attribution:
+        header.append(f"Speaker attribution: Enabled (accuracy depends on recording quality, speaker count, and speaker similarity)\n")
+    
+    header.append(f"{'='*len(display_filename)}\n\n")
+    
+    # Write header and transcription (the transcript is written as is,
+    # without first copying it into a larger string); the 1 MiB buffer lets
+    # a long transcript go out in a few large writes
+    with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        f.writelines(header)
+        f.write(formatted_text)
+        f.write("\n\n")
 
 def apply_speaker_labels_to_transcript(transcript_text, diarization_segments, audio_duration):
     """
@@ -1332,58 +1567,78 @@ def apply_speaker_labels_to_transcript(transcript_text, diarization_segments, au
         return transcript_text
     
     # Estimate time per word (rough approximation)
-    time_per_word = audio_duration / len(words) if len(words) > 0 else 0
-    
-    # Build attributed transcript
-    result_lines = []
-    current_speaker = None
-    current_text = []
-    word_index = 0
-    
-    for word in words:
-        # Estimate current timestamp
-        current_time = word_index * time_per_word
-        
-        # Find which speaker segment this corresponds to
-        speaker_for_word = None
-        for seg in diarization_segments:
-            if seg['start'] <= current_time <= seg['end']:
-                speaker_for_word = seg['speaker']
-                break
-        
-        # If speaker changed, start new line
-        if speaker_for_word and speaker_for_word != current_speaker:
-            # Save previous speaker's text
-            if current_text:
-                result_lines.append(f"[{current_speaker}] {' '.join(current_text)}")
-            current_speaker = speaker_for_word
-            current_text = [word]
-        else:
-            current_text.append(word)
-        
-        word_index += 1
-    
-    # Add final speaker's text
-    if current_text and current_speaker:
-        result_lines.append(f"[{current_speaker}] {' '.join(current_text)}")
+    time_per_word = audio_duration / len(words)
+    word_times = np.arange(len(words)) * time_per_word
+    
+    speakers = {seg['speaker'] for seg in diarization_segments}
+    if len(speakers) == 1 and all(speakers):
+        # Single speaker: the only possible line break is at the first word
+        # covered by any segment, so just that word needs to be found
+        first_words = np.searchsorted(word_times, [seg['start'] for seg in diarization_segments], side='left')
+        last_words = np.searchsorted(word_times, [seg['end'] for seg in diarization_segments], side='right')
+        covered = first_words[first_words < last_words]
+        result_lines = []
+        if covered.size:
+            first = int(covered.min())
+            if first:
+                result_lines.append(f"[None] {' '.join(words[:first])}")
+            result_lines.append(f"[{speakers.pop()}] {' '.join(words[first:])}")
+    else:
+        # Speaker code for each word: the first segment (in diarization order)
+        # whose span contains the word's estimated time, or -1 if none does.
+        # Word times are sorted, so each segment's words are found with
+        # searchsorted; painting the segments in reverse order lets earlier
+        # segments win where they overlap. Unnamed speakers never change the label
+        speaker_codes = {}
+        word_speakers = np.full(len(words), -1)
+        for seg in reversed(diarization_segments):
+            if seg['speaker'] and seg['speaker'] not in speaker_codes:
+                speaker_codes[seg['speaker']] = len(speaker_codes)
+            code = speaker_codes[seg['speaker']] if seg['speaker'] else -1
+            first = np.searchsorted(word_times, seg['start'], side='left')
+            last = np.searchsorted(word_times, seg['end'], side='right')
+            word_speakers[first:last] = code
+        
+        # Words without a speaker keep the current one, so forward-fill the codes
+        # and start a new line wherever the filled code changes
+        labelled = word_speakers >= 0
+        filled = word_speakers[np.maximum.accumulate(np.where(labelled, np.arange(len(words)), 0))]
+        boundaries = np.flatnonzero(filled[1:] != filled[:-1]) + 1
+        run_starts = [0, *boundaries.tolist()]
+        run_ends = [*boundaries.tolist(), len(words)]
+        
+        # Build attributed transcript; words before the first speaker are kept
+        # under a "None" label, and a transcript with no speakers is dropped
+        speaker_names = list(speaker_codes)
+        result_lines = []
+        if filled[-1] >= 0:
+            for run_start, run_end in zip(run_starts, run_ends):
+                code = filled[run_start]
+                speaker = speaker_names[code] if code >= 0 else None
+                result_lines.append(f"[{speaker}] {' '.join(words[run_start:run_end])}")
     
     attributed_transcript = '\n\n'.join(result_lines)
     print(f"   ✅ Speaker labels applied")
     
     return attributed_transcript
 
-def transcribe_audio_only(audio_path, model="openai/whisper-large-v3", language=None):
-    """Perform transcription only - no diarization."""
+def transcribe_audio_only(audio_path, model="openai/whisper-large-v3", language=None, audio_array=None):
+    """Perform transcription only - no diarization.
+    
+    If audio_array (16 kHz samples) is given, it is used instead of loading audio_path.
+    """
     print(f"  Transcribing audio (no diarization)...")
 
     # Initialize transcription pipeline
     try:
-        device = 0 if torch.cuda.is_available() else -1
+        from transformers import pipeline
+        
+        device = 0 if cuda_available() else -1
         
         # Base pipeline arguments
         pipeline_args = {
             "model": model,  # User-specified or default model
-            "dtype": torch.float16 if torch.cuda.is_available() else torch.float32,
+            "dtype": torch.float16 if cuda_available() else torch.float32,
             "device": device,
             "return_timestamps": False,    # No timestamps needed
             "chunk_length_s": 15,         # Process in 15-second chunks
@@ -1405,8 +1660,9 @@ def transcribe_audio_only(audio_path, model="openai/whisper-large-v3", language=
     # Perform transcription
     print("    Running transcription...")
     try:
-        # Load audio with librosa instead of letting transformers use ffmpeg
-        audio_array, sr = librosa.load(audio_path, sr=16000)
+        # Load audio ourselves instead of letting transformers use ffmpeg
+        if audio_array is None:
+            audio_array, sr = load_audio(audio_path, sr=16000)
         transcription_result = transcriber(audio_array)
         print(f"     Transcription completed")
         return transcription_result
@@ -1447,6 +1703,7 @@ def process_audio_file(input_file, mask_names=False, model="openai/whisper-large
         
         # Conditionally enhance audio based on enhance_audio_enabled flag
         audio_file_for_transcription = input_file  # Default to original file
+        enhanced_audio = None  # Enhanced samples kept in memory for transcription
         enhanced_audio_path = None
         
         if enhance_audio_enabled:
@@ -1461,7 +1718,7 @@ def process_audio_file(input_file, mask_names=False, model="openai/whisper-large
                 os.close(temp_fd)  # Close file descriptor, keep path
                 print(f"   🎧 Using temporary enhanced audio (not saved)")
 
-            enhance_audio(input_file, enhanced_audio_path)
+            enhanced_audio = enhance_audio(input_file, enhanced_audio_path)
             audio_file_for_transcription = enhanced_audio_path
         else:
             print(f"   🎧 Using original audio (enhancement disabled)")
@@ -1477,7 +1734,10 @@ def process_audio_file(input_file, mask_names=False, model="openai/whisper-large
             # Get audio duration for speaker label mapping
             try:
                 import librosa
-                audio_duration = librosa.get_duration(path=audio_file_for_transcription)
+                if enhanced_audio is not None:
+                    audio_duration = len(enhanced_audio) / 16000
+                else:
+                    audio_duration = librosa.get_duration(path=audio_file_for_transcription)
                 print(f"   Audio duration: {audio_duration:.2f} seconds")
             except Exception as e:
                 print(f"   ⚠️  Could not determine audio duration: {e}")
@@ -1485,7 +1745,8 @@ def process_audio_file(input_file, mask_names=False, model="openai/whisper-large
         # Step 3: Transcription 
         print("\n📝 TRANSCRIPTION")
         print("-" * 40)
-        transcription_result = transcribe_audio_only(audio_file_for_transcription, model, language)
+        transcription_result = transcribe_audio_only(audio_file_for_transcription, model, language,
+                                                     audio_array=enhanced_audio)
 
         if not transcription_result:
             print(f"❌ Transcription failed - cannot continue")